@@ -1,5 +1,4 @@
-from main import create_app
-from models import db, User
+from main import create_app, bootstrap_database
 import os
 
 # Create the Flask application1
@@ -13,15 +12,8 @@ def init_database():
         
     try:
         with app.app_context():
-            # Create all tables
-            db.create_all()
-            
-            # Create default faculty user if it doesn't exist
-            if not User.query.filter_by(username='faculty1').first():
-                faculty = User(username='faculty1', role='faculty')
-                faculty.set_password('adminpass')
-                db.session.add(faculty)
-                db.session.commit()
+            # Create tables, default accounts and system status
+            if bootstrap_database():
                 return 'Database initialized successfully! You can now log in with faculty1/adminpass'
             return 'Database already initialized!'
     except Exception as e:
@@ -0,0 +1,97 @@
+import logging
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from cache import TTLCache, publish_invalidation, register_invalidation_handler
+from models import db, PrintRequest, ArchivedPrintRequest
+
+logger = logging.getLogger(__name__)
+
+# Only finished requests are archived; pending ones always stay in print_requests
+ARCHIVABLE_STATUSES = ('printed', 'cancelled', 'expired')
+
+ARCHIVED_COLUMNS = ['id', 'user_id', 'status', 'created_at', 'updated_at']
+
+
+# ---------------------------------------------------------------------------
+# Archive horizon
+# ---------------------------------------------------------------------------
+archive_horizon_cache = TTLCache()
+register_invalidation_handler('archive_horizon', lambda key: archive_horizon_cache.pop('archive_horizon'))
+
+# Cached in place of None, so an empty archive is not looked up on every page
+_EMPTY = object()
+
+
+def archive_horizon():
+    """
+    Newest created_at in the archive, or None while it is empty.
+
+    Every archived request was created at or before this moment, so a page of
+    live requests that ends after it cannot need anything from the archive.
+    """
+    horizon = archive_horizon_cache.get('archive_horizon')
+    if horizon is None:
+        horizon = db.session.query(db.func.max(ArchivedPrintRequest.created_at)).scalar()
+        archive_horizon_cache.set('archive_horizon', _EMPTY if horizon is None else horizon,
+                                  ttl=current_app.config.get('ARCHIVE_HORIZON_CACHE_TTL'))
+        return horizon
+    return None if horizon is _EMPTY else horizon
+
+
+# ---------------------------------------------------------------------------
+# Archival job
+# ---------------------------------------------------------------------------
+def archive_old_requests(older_than_days, batch_size=1000):
+    """
+    Move finished requests not updated for ``older_than_days`` days to the archive.
+
+    Works in batches of ``batch_size`` rows, each its own INSERT ... SELECT and
+    DELETE in one transaction, so the table is never locked for long and an
+    interrupted run simply resumes. Returns the number of requests moved.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = 0
+
+    while True:
+        # created_at <= updated_at, so the created_at bound is implied; it lets the
+        # planner walk ix_print_requests_status_created instead of scanning the table
+        batch_ids = db.session.scalars(
+            db.select(PrintRequest.id)
+            .where(
+                PrintRequest.status.in_(ARCHIVABLE_STATUSES),
+                PrintRequest.created_at < cutoff,
+                PrintRequest.updated_at < cutoff
+            )
+            .order_by(PrintRequest.created_at, PrintRequest.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not batch_ids:
+            db.session.commit()
+            break
+
+        archived_at = datetime.utcnow()
+        db.session.execute(
+            db.insert(ArchivedPrintRequest).from_select(
+                ARCHIVED_COLUMNS + ['archived_at'],
+                db.select(
+                    *(getattr(PrintRequest, column) for column in ARCHIVED_COLUMNS),
+                    db.literal(archived_at, db.DateTime)
+                ).where(PrintRequest.id.in_(batch_ids))
+            )
+        )
+        db.session.execute(
+            db.delete(PrintRequest)
+            .where(PrintRequest.id.in_(batch_ids))
+            .execution_options(synchronize_session=False)
+        )
+        publish_invalidation('archive_horizon')
+        db.session.commit()
+        archive_horizon_cache.pop('archive_horizon')
+        moved += len(batch_ids)
+
+    if moved:
+        logger.info(f'Archived {moved} print requests older than {older_than_days} days')
+    return moved
@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in a fresh interpreter so every sample is a real cold start
+PROBE = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+from main import create_app
+t1 = time.perf_counter()
+app = create_app(os.environ.get('BENCH_CONFIG', 'production'))
+t2 = time.perf_counter()
+with app.test_client() as client:
+    client.get('/login', base_url='https://localhost')
+t3 = time.perf_counter()
+with app.test_client() as client:
+    client.get('/login', base_url='https://localhost')
+t4 = time.perf_counter()
+print(json.dumps({
+    'import': t1 - t0,
+    'create_app': t2 - t1,
+    'first_request': t3 - t2,
+    'warm_request': t4 - t3,
+}))
+"""
+
+
+def run_samples(fast_boot, runs, config_name):
+    env = dict(os.environ, FAST_BOOT='1' if fast_boot else '0', BENCH_CONFIG=config_name)
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def report(label, samples):
+    print(f"{label} (median of {len(samples)} cold starts, ms)")
+    total = []
+    for phase in ('import', 'create_app', 'first_request', 'warm_request'):
+        values = [sample[phase] * 1000 for sample in samples]
+        print(f"    {phase:<14} {statistics.median(values):8.1f}")
+    for sample in samples:
+        total.append((sample['import'] + sample['create_app'] + sample['first_request']) * 1000)
+    print(f"    {'cold total':<14} {statistics.median(total):8.1f}")
+    print()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure import, create_app and first-request time.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--config', default='production')
+    args = parser.parse_args()
+
+    report('Default boot', run_samples(False, args.runs, args.config))
+    report('Fast boot', run_samples(True, args.runs, args.config))
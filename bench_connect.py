@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in a fresh interpreter so the first query really opens a new connection
+PROBE = r"""
+import json, os, statistics, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+connections = []
+@event.listens_for(Engine, 'connect')
+def count_connect(dbapi_connection, connection_record):
+    connections.append(time.perf_counter())
+
+from main import create_app
+from models import db
+
+t0 = time.perf_counter()
+app = create_app(os.environ.get('BENCH_CONFIG', 'production'))
+t1 = time.perf_counter()
+
+@app.route('/__bench_query')
+def bench_query():
+    db.session.execute(db.text('SELECT 1'))
+    return 'ok'
+
+def timed_request(client):
+    started = time.perf_counter()
+    client.get('/__bench_query', base_url='https://localhost')
+    return time.perf_counter() - started
+
+with app.test_client() as client:
+    first = timed_request(client)
+    warm = [timed_request(client) for _ in range(int(os.environ['BENCH_WARM_REQUESTS']))]
+    idle = float(os.environ['BENCH_IDLE'])
+    after_idle = None
+    if idle:
+        time.sleep(idle)
+        after_idle = timed_request(client)
+
+print(json.dumps({
+    'create_app': t1 - t0,
+    'first_request': first,
+    'boot_to_first_result': t1 - t0 + first,
+    'warm_request': statistics.median(warm) if warm else 0.0,
+    'after_idle': after_idle,
+    'connections': len(connections),
+}))
+"""
+
+# (label, environment) per measured setup
+CASES = {
+    'server': {'DB_ENGINE_PROFILE': 'server', 'DB_CONNECT_WARMUP': '0'},
+    'serverless': {'DB_ENGINE_PROFILE': 'serverless', 'DB_CONNECT_WARMUP': '0'},
+    'serverless+warmup': {'DB_ENGINE_PROFILE': 'serverless', 'DB_CONNECT_WARMUP': '1'},
+    'nullpool': {'DB_ENGINE_PROFILE': 'nullpool', 'DB_CONNECT_WARMUP': '0'},
+}
+
+
+def run_samples(case_env, runs, config_name, warm_requests, idle):
+    env = dict(
+        os.environ,
+        BENCH_CONFIG=config_name,
+        BENCH_WARM_REQUESTS=str(warm_requests),
+        BENCH_IDLE=str(idle),
+        # Boot like a serverless instance: no create_all, no background worker
+        # holding a connection, no rate limit state between runs
+        FAST_BOOT='1',
+        EXPORT_WORKER_THREADS='0',
+        RATELIMIT_ENABLED='0',
+        **case_env
+    )
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def report(label, samples):
+    print(f"{label} (median of {len(samples)} cold starts, ms)")
+    for phase in ('create_app', 'first_request', 'boot_to_first_result', 'warm_request', 'after_idle'):
+        values = [sample[phase] * 1000 for sample in samples if sample[phase] is not None]
+        if values:
+            print(f"    {phase:<22} {statistics.median(values):8.1f}")
+    connections = statistics.median(sample['connections'] for sample in samples)
+    print(f"    {'connections opened':<22} {connections:8.0f}")
+    print()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Measure connect-plus-first-query latency of each database engine profile '
+                    'against DATABASE_URL, from a cold interpreter.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--config', default='production')
+    parser.add_argument('--warm-requests', type=int, default=10,
+                        help='Requests after the first one; the median is reported')
+    parser.add_argument('--idle', type=float, default=0,
+                        help='Seconds to sit idle before one more request, e.g. past the pooler timeout')
+    parser.add_argument('--cases', default=','.join(CASES),
+                        help=f'Comma-separated subset of: {", ".join(CASES)}')
+    args = parser.parse_args()
+
+    for label in args.cases.split(','):
+        report(label, run_samples(CASES[label], args.runs, args.config, args.warm_requests, args.idle))
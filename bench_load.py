@@ -0,0 +1,286 @@
+import abc
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+
+LOAD_STUDENT_PREFIX = 'loadstudent'
+CSRF_PATTERN = re.compile(r'name="csrf[-_]token"[^>]*(?:value|content)="([^"]+)"')
+
+
+class AppClient:
+    """One browser session against the app in this process (WSGI test client, no sockets)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    base_url = 'https://localhost'
+
+    def request(self, method, path, data=None):
+        # HTTPS so secure session cookies are kept; CSRF then also checks the Referer
+        response = self.client.open(path, method=method, data=data, base_url=self.base_url,
+                                    headers={'Referer': self.base_url + path})
+        return response.status_code, response.get_data().decode('utf-8', 'replace')
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class HttpClient:
+    """One browser session against a running server, e.g. gunicorn on a local database."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect()
+        )
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method,
+                                     headers={'Referer': self.base_url + path})
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                return response.status, response.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode('utf-8', 'replace')
+
+
+class Results:
+    """Latency samples and status codes per route, shared by every virtual user."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.lock = threading.Lock()
+
+    def record(self, route, seconds, status):
+        with self.lock:
+            self.latencies[route].append(seconds)
+            self.statuses[route][status] += 1
+
+    def summary(self, duration):
+        rows = {}
+        for route, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            rows[route] = {
+                'requests': len(ordered),
+                'rps': len(ordered) / duration,
+                'p50_ms': percentile(ordered, 50) * 1000,
+                'p95_ms': percentile(ordered, 95) * 1000,
+                'p99_ms': percentile(ordered, 99) * 1000,
+                'errors': sum(count for status, count in self.statuses[route].items()
+                              if status == 'error' or status >= 500),
+                'statuses': {str(status): count for status, count in self.statuses[route].items()},
+            }
+        return rows
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class VirtualUser(threading.Thread, abc.ABC):
+    """Logs in, browses with think time between actions and logs out again, until the deadline."""
+
+    def __init__(self, client, username, password, results, deadline, think_time):
+        super().__init__(daemon=True)
+        self.client = client
+        self.username = username
+        self.password = password
+        self.results = results
+        self.deadline = deadline
+        self.think_time = think_time
+        self.csrf_token = None
+
+    def call(self, route, method, path, data=None):
+        started = time.perf_counter()
+        try:
+            status, body = self.client.request(method, path, data)
+        except Exception:
+            status, body = 'error', ''
+        self.results.record(route, time.perf_counter() - started, status)
+        match = CSRF_PATTERN.search(body)
+        if match:
+            self.csrf_token = match.group(1)
+        return status
+
+    def think(self):
+        time.sleep(random.uniform(0, 2 * self.think_time))
+
+    def login(self):
+        self.call('GET /login', 'GET', '/login')
+        status = self.call('POST /login', 'POST', '/login', {
+            'username': self.username,
+            'password': self.password,
+            'csrf_token': self.csrf_token or ''
+        })
+        return status == 302
+
+    def run(self):
+        # Stagger the start so every user does not log in at the same instant
+        time.sleep(random.uniform(0, self.think_time))
+        while time.monotonic() < self.deadline:
+            if not self.login():
+                self.think()
+                continue
+            for _ in range(random.randint(3, 8)):
+                if time.monotonic() >= self.deadline:
+                    break
+                self.session_step()
+                self.think()
+            self.call('GET /logout', 'GET', '/logout')
+
+    @abc.abstractmethod
+    def session_step(self):
+        """One action of a logged-in session; subclasses pick the routes."""
+
+
+class Student(VirtualUser):
+    def session_step(self):
+        self.call('GET /student/dashboard', 'GET', '/student/dashboard')
+        if random.random() < 0.3:
+            self.call('POST /student/request-print', 'POST', '/student/request-print',
+                      {'csrf_token': self.csrf_token or ''})
+
+
+class Faculty(VirtualUser):
+    def __init__(self, *args, export_every=10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.export_every = export_every
+        self.polls = 0
+
+    def session_step(self):
+        self.call('GET /faculty/dashboard', 'GET', '/faculty/dashboard')
+        self.polls += 1
+        if self.export_every and self.polls % self.export_every == 0:
+            export_format = random.choice(['xlsx', 'csv'])
+            self.call(f'GET /faculty/export-requests ({export_format})', 'GET',
+                      f'/faculty/export-requests?status=pending&format={export_format}')
+
+
+def ensure_students(app, count, password):
+    """Create the load-test students that do not exist yet, all sharing one password hash."""
+    from hashing import hash_password
+    from models import db, User
+
+    with app.app_context():
+        existing = {username for (username,) in db.session.query(User.username)
+                    .filter(User.username.like(f'{LOAD_STUDENT_PREFIX}%'))}
+        password_hash = hash_password(password)
+        missing = [f'{LOAD_STUDENT_PREFIX}{number}' for number in range(count)
+                   if f'{LOAD_STUDENT_PREFIX}{number}' not in existing]
+        for username in missing:
+            db.session.add(User(
+                username=username,
+                password_hash=password_hash,
+                role='student',
+                name=f'Load Student {username[len(LOAD_STUDENT_PREFIX):]}',
+                branch=random.choice(['CSE-A', 'CSE-B', 'ECE', 'ME', 'IT']),
+                semester=random.choice(['S1', 'S3', 'S5', 'S7']),
+                year='2024',
+                batch='A'
+            ))
+        db.session.commit()
+        return len(missing)
+
+
+def run_load(args):
+    # Read by config.py, so set before the app is imported
+    os.environ.setdefault('EXPORT_WORKER_THREADS', '0')
+    if not args.keep_rate_limits:
+        os.environ['RATELIMIT_ENABLED'] = '0'
+    from main import create_app
+
+    app = create_app(args.config)
+
+    if not args.no_seed:
+        created = ensure_students(app, args.students, args.student_password)
+        print(f'{created} load-test students created')
+
+    def new_client():
+        return HttpClient(args.url) if args.url else AppClient(app)
+
+    results = Results()
+    deadline = time.monotonic() + args.duration
+    users = [
+        Student(new_client(), f'{LOAD_STUDENT_PREFIX}{number}', args.student_password,
+                results, deadline, args.think_time)
+        for number in range(args.students)
+    ] + [
+        Faculty(new_client(), args.faculty_username, args.faculty_password,
+                results, deadline, args.think_time, export_every=args.export_every)
+        for _ in range(args.faculty)
+    ]
+
+    started = time.monotonic()
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    return results.summary(time.monotonic() - started)
+
+
+def report(summary, baseline=None):
+    print(f"{'route':<42} {'reqs':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>6}")
+    for route, row in summary.items():
+        line = (f"{route:<42} {row['requests']:>6} {row['rps']:>7.1f} {row['p50_ms']:>8.1f} "
+                f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['errors']:>6}")
+        if baseline and route in baseline:
+            before = baseline[route]['p95_ms']
+            line += f"   p95 {row['p95_ms'] - before:+.1f} ms vs baseline"
+        print(line)
+        unexpected = {status: count for status, count in row['statuses'].items()
+                      if status not in ('200', '302')}
+        if unexpected:
+            print(f"{'':<42} statuses: {unexpected}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Simulate a semester-start rush: students logging in and requesting prints, '
+                    'faculty polling the queue and exporting it. Latencies are in ms.')
+    parser.add_argument('--students', type=int, default=50)
+    parser.add_argument('--faculty', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run')
+    parser.add_argument('--think-time', type=float, default=0.5,
+                        help='Mean pause between actions of one user, in seconds')
+    parser.add_argument('--export-every', type=int, default=10,
+                        help='Faculty export the pending queue every N dashboard polls (0: never)')
+    parser.add_argument('--url', help='Load a running server instead of the app in this process')
+    parser.add_argument('--config', default='development')
+    parser.add_argument('--student-password', default='loadtest-password')
+    parser.add_argument('--faculty-username', default='faculty1')
+    parser.add_argument('--faculty-password', default='adminpass')
+    parser.add_argument('--no-seed', action='store_true', help='Do not create the load-test students')
+    parser.add_argument('--keep-rate-limits', action='store_true',
+                        help='Keep rate limiting on in this process; start a --url server with '
+                             'RATELIMIT_ENABLED=0 to turn it off there')
+    parser.add_argument('--json', help='Write the results to this file')
+    parser.add_argument('--baseline', help='Compare p95 with the results of an earlier --json run')
+    args = parser.parse_args()
+
+    summary = run_load(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(summary, baseline)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
@@ -0,0 +1,342 @@
+import logging
+import os
+import select
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models import db, User, PrintRequest, ArchivedPrintRequest, SystemStatus
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel used to tell other workers to drop cached entries
+INVALIDATION_CHANNEL = 'printpal_cache'
+
+
+class TTLCache:
+    """
+    A small thread-safe, process-local cache whose entries expire after ``ttl`` seconds.
+
+    With ``maxsize`` set, the least recently used entry is evicted once the cache is full.
+    """
+
+    def __init__(self, ttl=30, maxsize=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None, maxsize=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        maxsize = maxsize or self.maxsize
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while maxsize and len(self._data) > maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# ---------------------------------------------------------------------------
+# Cross-worker invalidation
+# ---------------------------------------------------------------------------
+_invalidation_handlers = {}
+# Other NOTIFY channels served by the same listener thread, e.g. live request events
+_channel_handlers = {}
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def register_invalidation_handler(name, handler):
+    """
+    Call ``handler(key)`` whenever another worker publishes an invalidation for ``name``.
+
+    ``key`` is the string published with the invalidation, or None for "everything".
+    """
+    _invalidation_handlers[name] = handler
+
+
+def publish_invalidation(name, key=None, connection=None):
+    """
+    Queue an invalidation for ``name`` (optionally a single ``key``) in the current transaction.
+
+    On PostgreSQL this is a ``pg_notify`` that is only delivered to the other
+    workers once the surrounding transaction commits. Other databases have no
+    notification channel, so their workers fall back to the cache TTL.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        (connection or db.session).execute(
+            db.text('SELECT pg_notify(:channel, :payload)'),
+            {'channel': INVALIDATION_CHANNEL, 'payload': name if key is None else f'{name}:{key}'}
+        )
+
+
+def register_channel_handler(channel, handler):
+    """Call ``handler(payload)`` for every notification on another Postgres ``channel``."""
+    _channel_handlers[channel] = handler
+
+
+def _dispatch(payload):
+    name, _, key = payload.partition(':')
+    handler = _invalidation_handlers.get(name)
+    if handler:
+        handler(key or None)
+
+
+def _listen(url, poll_interval):
+    import psycopg2
+    import psycopg2.extensions
+
+    while True:
+        try:
+            conn = psycopg2.connect(url)
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN {INVALIDATION_CHANNEL}')
+                for channel in _channel_handlers:
+                    cursor.execute(f'LISTEN {channel}')
+
+            # Anything may have changed while we were not listening
+            for handler in list(_invalidation_handlers.values()):
+                handler(None)
+
+            while True:
+                if select.select([conn], [], [], poll_interval) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    if notify.channel == INVALIDATION_CHANNEL:
+                        _dispatch(notify.payload)
+                    elif notify.channel in _channel_handlers:
+                        _channel_handlers[notify.channel](notify.payload)
+        except Exception as e:
+            logger.warning(f'Cache invalidation listener disconnected: {str(e)}')
+            time.sleep(5)
+
+
+def start_invalidation_listener(app):
+    """
+    Start the LISTEN thread for this worker process (idempotent).
+
+    Called lazily on the first request so that it runs after gunicorn forks.
+    ``CACHE_LISTEN_URL`` can point at a direct (non-PgBouncer) connection,
+    since LISTEN does not work through a transaction-mode pooler.
+    """
+    global _listener_pid
+
+    if _listener_pid == os.getpid():
+        return
+
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        _listener_pid = os.getpid()
+
+        url = app.config.get('CACHE_LISTEN_URL') or app.config['SQLALCHEMY_DATABASE_URI']
+        if not url.startswith('postgresql'):
+            return
+
+        thread = threading.Thread(
+            target=_listen,
+            args=(url, app.config.get('CACHE_LISTEN_POLL_INTERVAL', 5)),
+            name='cache-invalidation-listener',
+            daemon=True
+        )
+        thread.start()
+
+
+# ---------------------------------------------------------------------------
+# System status
+# ---------------------------------------------------------------------------
+class SystemStatusSnapshot:
+    """Detached copy of the SystemStatus row that is safe to share between requests."""
+
+    def __init__(self, status):
+        self.id = status.id
+        self.is_active = status.is_active
+        self.updated_at = status.updated_at
+        self.updated_by = status.updated_by
+        self.reason = status.reason
+
+
+system_status_cache = TTLCache()
+register_invalidation_handler('system_status', lambda key: system_status_cache.pop('system_status'))
+
+
+def get_system_status():
+    """Return the current service status, reading the database at most once per TTL."""
+    status = system_status_cache.get('system_status')
+    if status is not None:
+        return status
+
+    row = SystemStatus.query.first()
+    if not row:
+        row = SystemStatus(is_active=True)
+        db.session.add(row)
+        db.session.commit()
+
+    status = SystemStatusSnapshot(row)
+    system_status_cache.set('system_status', status,
+                            ttl=current_app.config.get('SYSTEM_STATUS_CACHE_TTL'))
+    return status
+
+
+def update_system_status_cache(row):
+    """Write a freshly committed SystemStatus row through to this worker's cache."""
+    system_status_cache.set('system_status', SystemStatusSnapshot(row),
+                            ttl=current_app.config.get('SYSTEM_STATUS_CACHE_TTL'))
+
+
+# ---------------------------------------------------------------------------
+# Admin dashboard statistics
+# ---------------------------------------------------------------------------
+dashboard_stats_cache = TTLCache()
+register_invalidation_handler('dashboard_stats', lambda key: dashboard_stats_cache.pop('dashboard_stats'))
+
+
+def get_dashboard_stats():
+    """
+    Return the admin dashboard counters.
+
+    All six counts come from one statement (two single-row aggregate subqueries
+    cross joined) and are cached for DASHBOARD_STATS_CACHE_TTL seconds.
+    """
+    stats = dashboard_stats_cache.get('dashboard_stats')
+    if stats is not None:
+        return stats
+
+    user_counts = db.select(
+        db.func.count(User.id).label('total_users'),
+        db.func.count(User.id).filter(User.role == 'student').label('total_students'),
+        db.func.count(User.id).filter(User.role == 'faculty').label('total_faculty'),
+        db.func.count(User.id).filter(User.is_active == db.true()).label('active_users')
+    ).subquery()
+    archived_count = db.select(db.func.count(ArchivedPrintRequest.id)).scalar_subquery()
+    request_counts = db.select(
+        (db.func.count(PrintRequest.id) + archived_count).label('total_requests'),
+        db.func.count(PrintRequest.id).filter(PrintRequest.status == 'pending').label('pending_requests')
+    ).subquery()
+
+    row = db.session.execute(
+        db.select(user_counts, request_counts).select_from(
+            user_counts.join(request_counts, db.true())
+        )
+    ).one()
+
+    stats = dict(row._mapping)
+    dashboard_stats_cache.set('dashboard_stats', stats,
+                              ttl=current_app.config.get('DASHBOARD_STATS_CACHE_TTL'))
+    return stats
+
+
+def invalidate_dashboard_stats():
+    """Drop the cached counters here and, once the transaction commits, in other workers."""
+    dashboard_stats_cache.pop('dashboard_stats')
+    publish_invalidation('dashboard_stats')
+
+
+# ---------------------------------------------------------------------------
+# Flask-Login user loader
+# ---------------------------------------------------------------------------
+user_cache = TTLCache()
+# Marker in a session's changed-user set meaning "any user may have changed"
+ALL_USERS = object()
+
+
+def _invalidate_users(key):
+    if key is None:
+        user_cache.clear()
+    else:
+        user_cache.pop(int(key))
+
+
+register_invalidation_handler('user', _invalidate_users)
+
+
+def load_cached_user(user_id):
+    """
+    Load a user for Flask-Login, skipping the database while a fresh snapshot is cached.
+
+    The snapshot is rebuilt into a detached User and merged with ``load=False``,
+    so the view gets a normal persistent object it can modify and commit.
+    """
+    data = user_cache.get(user_id)
+    if data is None:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            user_cache.set(
+                user_id,
+                {attr.key: getattr(user, attr.key) for attr in db.inspect(User).column_attrs},
+                ttl=current_app.config.get('USER_CACHE_TTL'),
+                maxsize=current_app.config.get('USER_CACHE_SIZE')
+            )
+        return user
+
+    user = db.inspect(User).class_manager.new_instance()
+    for key, value in data.items():
+        set_committed_value(user, key, value)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+@db.event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault('changed_user_ids', set())
+    new_ids = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id not in changed:
+            new_ids.add(obj.id)
+    for user_id in new_ids:
+        publish_invalidation('user', user_id, connection=session.connection())
+    changed.update(new_ids)
+
+
+@db.event.listens_for(Session, 'after_bulk_update')
+@db.event.listens_for(Session, 'after_bulk_delete')
+def _collect_bulk_user_changes(context):
+    if context.mapper.class_ is User:
+        changed = context.session.info.setdefault('changed_user_ids', set())
+        if ALL_USERS not in changed:
+            publish_invalidation('user', connection=context.session.connection())
+            changed.add(ALL_USERS)
+
+
+@db.event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    changed = session.info.pop('changed_user_ids', None)
+    if not changed:
+        return
+    if ALL_USERS in changed:
+        user_cache.clear()
+    else:
+        for user_id in changed:
+            user_cache.pop(user_id)
+
+
+@db.event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_users(session):
+    session.info.pop('changed_user_ids', None)
@@ -1,5 +1,5 @@
 from main import create_app
-from models import db, User, PrintRequest
+from models import db, User, PrintRequest, ArchivedPrintRequest
 
 def clear_database():
     app = create_app()
@@ -8,6 +8,7 @@ def clear_database():
         try:
             # Delete all print requests
             PrintRequest.query.delete()
+            ArchivedPrintRequest.query.delete()
             
             # Delete all users except faculty1
             User.query.filter(User.username != 'faculty1').delete()
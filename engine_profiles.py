@@ -0,0 +1,89 @@
+import threading
+
+from sqlalchemy.pool import NullPool
+
+# Pool settings per deployment, picked with DB_ENGINE_PROFILE:
+#   server     long-running gunicorn workers; a pool per worker, sized for its threads
+#   serverless one instance per concurrent request (Vercel): a single kept connection
+#              plus a little overflow for background threads, re-checked after the
+#              instance was frozen and recycled before the pooler drops it
+#   nullpool   serverless without keeping anything: a fresh connection per checkout,
+#              for platforms that kill idle sockets between invocations
+ENGINE_PROFILES = {
+    'server': {
+        'pool_size': 10,
+        'max_overflow': 2,
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        # Neon suspends idle computes, which drops every pooled connection
+        'pool_pre_ping': True,
+    },
+    'serverless': {
+        'pool_size': 1,
+        'max_overflow': 2,
+        'pool_timeout': 10,
+        'pool_recycle': 300,
+        'pool_pre_ping': True,
+    },
+    'nullpool': {
+        'poolclass': NullPool,
+    },
+}
+
+# Fail fast instead of holding the request while an unreachable host times out
+SERVERLESS_CONNECT_TIMEOUT = 5
+
+
+def engine_options(profile, database_uri, pool_size=None, max_overflow=None):
+    """SQLALCHEMY_ENGINE_OPTIONS for ``profile``, adjusted to the database driver."""
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f'Unknown DB_ENGINE_PROFILE {profile!r}; use one of {", ".join(ENGINE_PROFILES)}')
+
+    options = dict(ENGINE_PROFILES[profile])
+    if 'poolclass' not in options:
+        if pool_size is not None:
+            options['pool_size'] = pool_size
+        if max_overflow is not None:
+            options['max_overflow'] = max_overflow
+
+    if not database_uri.startswith('postgresql'):
+        return options
+
+    connect_args = {}
+    if profile != 'server':
+        connect_args['connect_timeout'] = SERVERLESS_CONNECT_TIMEOUT
+    # Neon's pooler is PgBouncer in transaction mode, where a statement prepared on
+    # one server connection is gone on the next. psycopg2 never prepares; psycopg 3
+    # does after a few executions unless told not to
+    if database_uri.startswith('postgresql+psycopg:'):
+        connect_args['prepare_threshold'] = None
+    if connect_args:
+        options['connect_args'] = connect_args
+    return options
+
+
+def start_connect_warmup(app, timeout=10):
+    """
+    Open the first pooled connection in a background thread, so the TCP/TLS and
+    auth handshakes overlap the rest of the cold start instead of the first request.
+    Requests wait up to ``timeout`` seconds for it rather than opening a second one.
+    """
+    from models import db
+
+    def warm_up():
+        with app.app_context():
+            try:
+                with db.engine.connect() as connection:
+                    connection.execute(db.text('SELECT 1'))
+            except Exception as e:
+                app.logger.warning(f'Database connection warm-up failed: {str(e)}')
+
+    thread = threading.Thread(target=warm_up, name='db-warmup', daemon=True)
+    thread.start()
+
+    @app.before_request
+    def _wait_for_connect_warmup():
+        if thread.is_alive():
+            thread.join(timeout)
+
+    return thread
@@ -0,0 +1,133 @@
+import json
+import logging
+import queue
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from cache import register_channel_handler
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel carrying print request events to every worker
+EVENTS_CHANNEL = 'printpal_events'
+# Requests per notification; keeps payloads well under the 8000 byte NOTIFY limit
+EVENT_CHUNK_SIZE = 200
+
+
+class EventBroker:
+    """
+    Fans events out to the SSE streams connected to this worker.
+
+    Each subscriber gets a bounded queue; a client too slow to drain it misses
+    events rather than growing memory, and resyncs when it reconnects.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, limit=None):
+        """A new subscriber queue, or None if ``limit`` subscribers are already connected."""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                pass
+
+
+broker = EventBroker()
+
+
+def _receive(payload):
+    try:
+        broker.publish(json.loads(payload))
+    except ValueError:
+        logger.warning(f'Ignoring malformed request event: {payload[:200]}')
+
+
+register_channel_handler(EVENTS_CHANNEL, _receive)
+
+
+def publish_request_event(event_type, print_requests, **fields):
+    """
+    Queue a ``created``/``printed``/``cancelled`` event for the given requests.
+
+    ``print_requests`` is an iterable of PrintRequest objects or ``(id, user_id)``
+    pairs. The event is only sent once the current transaction commits: via
+    ``pg_notify`` on PostgreSQL, so every worker's listener picks it up, and
+    straight to this worker's broker elsewhere (single node, SQLite, tests).
+    """
+    pairs = [
+        (item.id, item.user_id) if hasattr(item, 'user_id') else tuple(item)
+        for item in print_requests
+    ]
+    for start in range(0, len(pairs), EVENT_CHUNK_SIZE):
+        event = dict(fields, type=event_type, requests=pairs[start:start + EVENT_CHUNK_SIZE])
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(
+                db.text('SELECT pg_notify(:channel, :payload)'),
+                {'channel': EVENTS_CHANNEL, 'payload': json.dumps(event, default=str)}
+            )
+        else:
+            db.session.info.setdefault('pending_request_events', []).append(event)
+
+
+@db.event.listens_for(Session, 'after_commit')
+def _publish_committed_events(session):
+    for event in session.info.pop('pending_request_events', []):
+        broker.publish(event)
+
+
+@db.event.listens_for(Session, 'after_rollback')
+def _drop_rolled_back_events(session):
+    session.info.pop('pending_request_events', None)
+
+
+def _format(event_type, data):
+    return f'event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n'
+
+
+def event_stream(subscriber, user_id=None, keepalive=15, max_duration=60):
+    """
+    Yield Server-Sent Events for print request changes from a ``broker.subscribe()`` queue.
+
+    With ``user_id`` set only that student's requests are included. The stream
+    ends after ``max_duration`` seconds and the browser's EventSource reconnects,
+    so a connection never pins a worker thread indefinitely.
+    """
+    deadline = time.monotonic() + max_duration
+    try:
+        yield 'retry: 5000\n\n'
+        while time.monotonic() < deadline:
+            try:
+                event = subscriber.get(timeout=keepalive)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+
+            requests = event['requests']
+            if user_id is not None:
+                requests = [pair for pair in requests if pair[1] == user_id]
+                if not requests:
+                    continue
+            yield _format(event['type'], dict(event, requests=requests))
+    finally:
+        broker.unsubscribe(subscriber)
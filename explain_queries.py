@@ -0,0 +1,94 @@
+import argparse
+from datetime import datetime
+
+from main import create_app
+from models import db, User, PrintRequest
+from search import user_search_filter
+
+# A cursor position far enough in the future to match the whole table
+SAMPLE_CURSOR = (datetime(2100, 1, 1), 2 ** 31 - 1)
+
+
+def route_queries(sample_user_id, search='stu'):
+    """The queries each route issues, built the same way the views build them."""
+    position_key = db.tuple_(PrintRequest.created_at, PrintRequest.id)
+    newest_first = (PrintRequest.created_at.desc(), PrintRequest.id.desc())
+
+    return [
+        ('student_dashboard: own requests page',
+         PrintRequest.query.filter_by(user_id=sample_user_id)
+         .filter(position_key < SAMPLE_CURSOR)
+         .order_by(*newest_first).limit(11)),
+        ('student_dashboard: pending request check',
+         PrintRequest.query.filter_by(user_id=sample_user_id, status='pending').limit(1)),
+        ('faculty_dashboard: pending queue page',
+         PrintRequest.query.join(User).filter(PrintRequest.status == 'pending')
+         .filter(position_key < SAMPLE_CURSOR)
+         .order_by(*newest_first).limit(11)),
+        ('faculty_dashboard: pending queue search',
+         PrintRequest.query.join(User).filter(PrintRequest.status == 'pending')
+         .filter(user_search_filter(search, include_name=False))
+         .order_by(*newest_first).limit(11)),
+        ('print_history: printed page',
+         PrintRequest.query.join(User).filter(PrintRequest.status == 'printed')
+         .filter(position_key < SAMPLE_CURSOR)
+         .order_by(*newest_first).limit(11)),
+        ('export_requests: requests by status',
+         PrintRequest.query.join(User).filter(PrintRequest.status == 'pending')
+         .order_by(PrintRequest.created_at.desc())),
+        ('auth_students: students by branch/semester',
+         User.query.filter_by(role='student', branch='CSE-A', semester='S3')
+         .order_by(User.created_at.desc()).limit(10)),
+        ('admin_dashboard: user search',
+         User.query.filter(user_search_filter(search))
+         .order_by(User.created_at.desc()).limit(10)),
+        ('admin_dashboard: students count',
+         db.session.query(db.func.count(User.id)).filter(User.role == 'student')),
+        ('admin_dashboard: pending count',
+         db.session.query(db.func.count(PrintRequest.id)).filter(PrintRequest.status == 'pending')),
+    ]
+
+
+def explain(query, analyze=False):
+    """Return the plan lines for a query on the current database."""
+    connection = db.session.connection()
+    dialect = connection.dialect
+    compiled = query.statement.compile(dialect=dialect)
+
+    if dialect.name == 'postgresql':
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+    elif dialect.name == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        prefix = 'EXPLAIN '
+
+    params = compiled.params
+    if dialect.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    rows = connection.exec_driver_sql(prefix + str(compiled), params).fetchall()
+    return [' | '.join(str(value) for value in row) for row in rows]
+
+
+def print_plans(analyze=False):
+    app = create_app()
+
+    with app.app_context():
+        sample_user = User.query.filter_by(role='student').first()
+        sample_user_id = sample_user.id if sample_user else 0
+
+        for title, query in route_queries(sample_user_id):
+            print(f"=== {title}")
+            for line in explain(query, analyze=analyze):
+                print(f"    {line}")
+            print()
+
+        db.session.rollback()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Print EXPLAIN plans for each route's hot query.")
+    parser.add_argument('--analyze', action='store_true',
+                        help='Run EXPLAIN ANALYZE (PostgreSQL only; executes the queries)')
+    args = parser.parse_args()
+    print_plans(analyze=args.analyze)
@@ -0,0 +1,303 @@
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from archive import archive_old_requests
+from cache import register_channel_handler, start_invalidation_listener
+from models import db, ExportJob, ExportJobChunk
+from exports import requests_export, students_export, users_export
+
+logger = logging.getLogger(__name__)
+
+# Export builders by job kind; each takes the job's params as keyword arguments
+EXPORT_BUILDERS = {
+    'requests': requests_export,
+    'students': students_export,
+    'users': users_export,
+}
+
+# A running job whose heartbeat is older than this is assumed dead and re-queued
+STALE_AFTER = timedelta(minutes=10)
+MAX_ATTEMPTS = 3
+
+# How often a worker runs the print request archival (when enabled)
+ARCHIVE_INTERVAL = 3600
+
+# Finished files are stored (and streamed back) in pieces of this many bytes
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+# Postgres NOTIFY channel that wakes idle workers when a job is queued
+EXPORT_CHANNEL = 'printpal_exports'
+
+_worker_pid = None
+_worker_lock = threading.Lock()
+# Set when a job is queued, so idle workers start it without waiting for the next poll
+_wakeup = threading.Event()
+
+register_channel_handler(EXPORT_CHANNEL, lambda payload: _wakeup.set())
+
+
+@db.event.listens_for(Session, 'after_commit')
+def _wake_workers(session):
+    if session.info.pop('export_job_queued', False):
+        _wakeup.set()
+
+
+@db.event.listens_for(Session, 'after_rollback')
+def _forget_queued_job(session):
+    session.info.pop('export_job_queued', None)
+
+
+def enqueue_export(kind, params, user_id):
+    """Add an export job in the current transaction and return it (flushed, so it has an id)."""
+    if kind not in EXPORT_BUILDERS:
+        raise ValueError(f'Unknown export kind: {kind}')
+    job = ExportJob(kind=kind, params=json.dumps(params, default=str), requested_by=user_id)
+    db.session.add(job)
+    db.session.flush()
+
+    _notify_workers(job.id)
+    return job
+
+
+def _notify_workers(job_id):
+    # Wake workers once the job is committed: this process's threads directly,
+    # other processes through NOTIFY on PostgreSQL (they poll otherwise)
+    db.session.info['export_job_queued'] = True
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('SELECT pg_notify(:channel, :payload)'),
+                           {'channel': EXPORT_CHANNEL, 'payload': str(job_id)})
+
+
+def _requeue_stale_jobs():
+    # Jobs whose worker died mid-export get another attempt, up to MAX_ATTEMPTS.
+    # Without heartbeats (SQLite) a long export is indistinguishable from a dead
+    # one, so nothing is re-queued there; `flask retry-export` does it by hand
+    if db.engine.dialect.name == 'sqlite':
+        return
+    cutoff = datetime.utcnow() - STALE_AFTER
+    stale = ExportJob.query.filter(ExportJob.status == 'running', ExportJob.heartbeat_at < cutoff)
+    stale.filter(ExportJob.attempts >= MAX_ATTEMPTS)\
+        .update({'status': 'failed', 'error': 'Export worker stopped responding',
+                 'finished_at': datetime.utcnow()}, synchronize_session=False)
+    stale.filter(ExportJob.attempts < MAX_ATTEMPTS)\
+        .update({'status': 'queued'}, synchronize_session=False)
+    db.session.commit()
+
+
+def claim_next_job():
+    """
+    Claim the oldest queued job and mark it running. Returns its id, or None.
+
+    On PostgreSQL the candidate row is locked with FOR UPDATE SKIP LOCKED, so
+    concurrent workers never wait on each other or pick the same job. The
+    conditional UPDATE makes the claim safe on databases without row locks too.
+    """
+    job_id = db.session.query(ExportJob.id)\
+        .filter(ExportJob.status == 'queued')\
+        .order_by(ExportJob.id)\
+        .with_for_update(skip_locked=True)\
+        .limit(1)\
+        .scalar()
+    if job_id is None:
+        db.session.commit()
+        return None
+
+    now = datetime.utcnow()
+    claimed = ExportJob.query.filter_by(id=job_id, status='queued')\
+        .update({'status': 'running', 'started_at': now, 'heartbeat_at': now,
+                 'attempts': ExportJob.attempts + 1}, synchronize_session=False)
+    db.session.commit()
+    return job_id if claimed else None
+
+
+def _heartbeat(job_id, rows_written):
+    # Separate short transaction: the export itself is still reading through its cursor
+    if db.engine.dialect.name == 'sqlite':
+        # SQLite would block this write behind the open read; progress is skipped there
+        return
+    with db.engine.begin() as connection:
+        connection.execute(
+            db.update(ExportJob)
+            .where(ExportJob.id == job_id)
+            .values(progress=rows_written, heartbeat_at=datetime.utcnow())
+        )
+
+
+def _store_file(job_id, output):
+    """Copy the finished file into ExportJobChunks, one chunk in memory at a time. Returns its size."""
+    # A retried job may have left chunks behind
+    ExportJobChunk.query.filter_by(job_id=job_id).delete(synchronize_session=False)
+    size = 0
+    seq = 0
+    while True:
+        data = output.read(EXPORT_CHUNK_SIZE)
+        if not data:
+            return size
+        db.session.execute(db.insert(ExportJobChunk), {'job_id': job_id, 'seq': seq, 'data': data})
+        size += len(data)
+        seq += 1
+
+
+def stream_file(job_id):
+    """Yield a finished job's file chunk by chunk, through a server-side cursor."""
+    chunks = db.session.execute(
+        db.select(ExportJobChunk.data)
+        .where(ExportJobChunk.job_id == job_id)
+        .order_by(ExportJobChunk.seq)
+        .execution_options(yield_per=1)
+    )
+    for data in chunks.scalars():
+        yield data
+
+
+def run_job(job_id):
+    """Build the export for a claimed job and store the finished file in chunks."""
+    job = db.session.get(ExportJob, job_id)
+    started = time.monotonic()
+    try:
+        export = EXPORT_BUILDERS[job.kind](**json.loads(job.params))
+        rows_written = 0
+
+        def progress(count):
+            nonlocal rows_written
+            rows_written = count
+            _heartbeat(job_id, count)
+
+        with tempfile.TemporaryFile() as output:
+            export.write(output, progress)
+            output.seek(0)
+            size = _store_file(job_id, output)
+
+        job.status = 'done'
+        job.size = size
+        job.filename = export.filename
+        job.mimetype = export.mimetype
+        job.progress = max(rows_written, job.progress or 0)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        logger.info(f'Export job {job_id} ({job.kind}) finished in {time.monotonic() - started:.1f}s, {size} bytes')
+    except Exception as e:
+        db.session.rollback()
+        # Retried rather than dropped: a pending export has already marked its
+        # requests as printed, and this job is the only way into a file for them
+        attempts = db.session.query(ExportJob.attempts).filter_by(id=job_id).scalar()
+        if attempts < MAX_ATTEMPTS:
+            logger.warning(f'Export job {job_id} failed (attempt {attempts} of {MAX_ATTEMPTS}), re-queued: {str(e)}')
+            values = {'status': 'queued', 'error': str(e)[:500]}
+        else:
+            logger.error(f'Export job {job_id} failed after {attempts} attempts: {str(e)}')
+            values = {'status': 'failed', 'error': str(e)[:500], 'finished_at': datetime.utcnow()}
+        ExportJob.query.filter_by(id=job_id).update(values, synchronize_session=False)
+        db.session.commit()
+
+
+def retry_job(job_id):
+    """
+    Re-queue a failed (or stuck running) job with a fresh set of attempts.
+
+    Returns False if there is no such job or it is still queued or done.
+    """
+    retried = ExportJob.query\
+        .filter(ExportJob.id == job_id, ExportJob.status.in_(['failed', 'running']))\
+        .update({'status': 'queued', 'attempts': 0, 'finished_at': None}, synchronize_session=False)
+    if retried:
+        _notify_workers(job_id)
+    db.session.commit()
+    return bool(retried)
+
+
+def purge_expired_jobs(max_age):
+    """Delete finished jobs (and their files) older than ``max_age``."""
+    cutoff = datetime.utcnow() - max_age
+    expired = ExportJob.query.filter(
+        ExportJob.status.in_(['done', 'failed']),
+        ExportJob.finished_at < cutoff
+    )
+    # Explicitly, as SQLite does not enforce the ON DELETE CASCADE
+    ExportJobChunk.query.filter(ExportJobChunk.job_id.in_(expired.with_entities(ExportJob.id)))\
+        .delete(synchronize_session=False)
+    deleted = expired.delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def run_worker(app, poll_interval=None, once=False):
+    """
+    Process export jobs until stopped (or until the queue is empty with ``once``).
+
+    Runs as ``flask export-worker`` in its own process, or in a daemon thread of
+    the web worker when EXPORT_WORKER_THREADS is set. Between jobs it also does
+    the periodic housekeeping: stale jobs, expired files and request archival.
+    """
+    poll_interval = poll_interval or app.config.get('EXPORT_POLL_INTERVAL', 15)
+    retention = timedelta(hours=app.config.get('EXPORT_RETENTION_HOURS', 24))
+    archive_after_days = app.config.get('REQUEST_ARCHIVE_AFTER_DAYS', 0)
+    worker_name = f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'
+    logger.info(f'Export worker {worker_name} started')
+    # NOTIFY wakeups for jobs queued by other processes
+    start_invalidation_listener(app)
+
+    last_maintenance = last_archive = float('-inf')
+    while True:
+        _wakeup.clear()
+        with app.app_context():
+            try:
+                if time.monotonic() - last_maintenance > 60:
+                    _requeue_stale_jobs()
+                    purge_expired_jobs(retention)
+                    last_maintenance = time.monotonic()
+                if archive_after_days and time.monotonic() - last_archive > ARCHIVE_INTERVAL:
+                    last_archive = time.monotonic()
+                    archive_old_requests(archive_after_days,
+                                         app.config.get('REQUEST_ARCHIVE_BATCH_SIZE', 1000))
+
+                job_id = claim_next_job()
+                while job_id is not None:
+                    run_job(job_id)
+                    db.session.remove()
+                    job_id = claim_next_job()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f'Export worker {worker_name} error: {str(e)}')
+            finally:
+                db.session.remove()
+
+        if once:
+            return
+        _wakeup.wait(poll_interval)
+
+
+def start_export_worker(app):
+    """
+    Start EXPORT_WORKER_THREADS in-process worker threads for this process (idempotent).
+
+    Convenient for single-node and development setups; production deployments can
+    set it to 0 and run ``flask export-worker`` processes instead.
+    """
+    global _worker_pid
+
+    threads = app.config.get('EXPORT_WORKER_THREADS', 0)
+    if threads <= 0 or _worker_pid == os.getpid():
+        return
+
+    with _worker_lock:
+        if _worker_pid == os.getpid():
+            return
+        _worker_pid = os.getpid()
+
+        for number in range(threads):
+            thread = threading.Thread(
+                target=run_worker,
+                args=(app,),
+                name=f'export-worker-{number}',
+                daemon=True
+            )
+            thread.start()
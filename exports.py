@@ -0,0 +1,422 @@
+import csv
+import io
+import tempfile
+import time
+from datetime import datetime
+
+from flask import Response, send_file, stream_with_context
+
+from metrics import observe_export
+from models import db, User, PrintRequest, ArchivedPrintRequest
+from search import user_search_filter
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_MIMETYPE = 'text/csv'
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+# Print request export header, as print_agent.py reads it
+REQUEST_EXPORT_COLUMNS = ['Date', 'Student Name', 'Semester', 'Branch', 'Username', 'Print Path (TEST)']
+
+
+class ColumnWidths:
+    """Track the widest value seen in each column while rows are written."""
+
+    def __init__(self, columns):
+        self.widths = [len(str(column)) for column in columns]
+
+    def update(self, row):
+        for col_num, value in enumerate(row):
+            length = len(str(value)) if value is not None else 0
+            if length > self.widths[col_num]:
+                self.widths[col_num] = length
+
+    def apply(self, worksheet, padding=2):
+        for col_num, width in enumerate(self.widths):
+            worksheet.set_column(col_num, col_num, width + padding)
+
+
+def header_format(workbook):
+    """The bold bordered header style pandas used for exported sheets."""
+    return workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+
+
+def write_sheet(workbook, sheet_name, columns, rows):
+    """Write a simple one-header-row sheet from an iterable of row lists."""
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, columns, header_format(workbook))
+    for row_num, row in enumerate(rows, start=1):
+        worksheet.write_row(row_num, 0, row)
+    return worksheet
+
+
+def stream_csv(columns, rows, filename):
+    """Stream rows as a CSV download, one chunk per row."""
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+def write_csv(output, columns, rows, progress=None):
+    """Write rows as CSV into a binary file object."""
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text, lineterminator='\n')
+    writer.writerow(columns)
+    writer.writerows(_counted(rows, progress))
+    # Leave the underlying file open for the caller
+    text.detach()
+
+
+class Export:
+    """
+    One export: its file name, format, header and a lazily evaluated row source.
+
+    ``rows`` yields plain row lists, or ``(group, row)`` pairs when ``grouped``
+    is set; grouped exports get one worksheet per group in XLSX and ignore the
+    group in CSV. ``kind`` labels the export in the metrics.
+    """
+
+    def __init__(self, filename, export_format, columns, rows, grouped=False, kind='export'):
+        self.kind = kind
+        self.filename = filename
+        self.export_format = export_format
+        self.columns = columns
+        self.rows = rows
+        self.grouped = grouped
+
+    @property
+    def mimetype(self):
+        return CSV_MIMETYPE if self.export_format == 'csv' else XLSX_MIMETYPE
+
+    def plain_rows(self):
+        if self.grouped:
+            return (row for _group, row in self.rows)
+        return self.rows
+
+    def write(self, output, progress=None):
+        """
+        Write the whole file into the binary file object ``output``.
+
+        Workbooks use constant_memory mode: each worksheet flushes its rows to
+        disk as soon as the next row starts, so memory does not grow with the export.
+        """
+        started = time.monotonic()
+        rows_written = 0
+
+        def track(count):
+            nonlocal rows_written
+            rows_written = count
+            if progress:
+                progress(count)
+
+        if self.export_format == 'csv':
+            write_csv(output, self.columns, self.plain_rows(), track)
+        else:
+            import xlsxwriter  # imported on first export to keep cold starts fast
+
+            workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+            if self.grouped:
+                write_grouped_sheets(workbook, self.columns, self.rows, track)
+            else:
+                write_sheet(workbook, 'Sheet1', self.columns, _counted(self.rows, track))
+            workbook.close()
+
+        observe_export(self.kind, self.export_format, time.monotonic() - started, rows_written)
+
+    def response(self):
+        """Download response for a synchronous export: streamed CSV or a finished workbook."""
+        if self.export_format == 'csv':
+            return stream_csv(self.columns, self._observed(self.plain_rows()), self.filename)
+
+        output = tempfile.TemporaryFile()
+        self.write(output)
+        output.seek(0)
+        return send_file(output, mimetype=XLSX_MIMETYPE, as_attachment=True,
+                         download_name=self.filename)
+
+    def _observed(self, rows):
+        # Streamed CSV is only finished once the client has read the last row
+        started = time.monotonic()
+        row_num = 0
+        for row_num, row in enumerate(rows, start=1):
+            yield row
+        observe_export(self.kind, self.export_format, time.monotonic() - started, row_num)
+
+
+def _counted(rows, progress):
+    # Report progress once per fetched batch and once at the end
+    row_num = 0
+    for row_num, row in enumerate(rows, start=1):
+        yield row
+        if progress and row_num % EXPORT_BATCH_SIZE == 0:
+            progress(row_num)
+    if progress:
+        progress(row_num)
+
+
+def write_grouped_sheets(workbook, columns, grouped_rows, progress=None):
+    """One titled sheet per (branch, semester) group, as the print request export lays them out."""
+    # Create header format
+    header_format = workbook.add_format({
+        'bold': True,
+        'font_size': 14,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#f0f0f0',
+        'border': 1
+    })
+    
+    # Create column header format
+    column_format = workbook.add_format({
+        'bold': True,
+        'font_size': 11,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#e6e6e6',
+        'border': 1
+    })
+    
+    # Rows arrive newest first across all groups, so each sheet keeps its own
+    # next row number and column widths
+    sheets = {}
+    for (branch, semester), row in _counted(grouped_rows, progress):
+        sheet = sheets.get((branch, semester))
+        if sheet is None:
+            worksheet = workbook.add_worksheet(f"{semester} {branch}")
+            
+            # Write sheet header and column headers
+            worksheet.merge_range('A1:E1', f"{branch} - {semester}", header_format)
+            worksheet.write_row(2, 0, columns, column_format)
+            
+            sheet = sheets[(branch, semester)] = {
+                'worksheet': worksheet,
+                'next_row': 3,
+                'widths': ColumnWidths(columns)
+            }
+        
+        sheet['worksheet'].write_row(sheet['next_row'], 0, row)
+        sheet['widths'].update(row)
+        sheet['next_row'] += 1
+    
+    # Auto-fit columns
+    for sheet in sheets.values():
+        sheet['widths'].apply(sheet['worksheet'])
+
+
+# ---------------------------------------------------------------------------
+# Export definitions, shared by the download routes and the export job worker
+# ---------------------------------------------------------------------------
+def test_print_path_parts(user):
+    """The (branch folder, year, batch, admission no) folders of a student's test print path."""
+    # Derive branch folder from stored branch code
+    branch_code = (user.branch or "").split("-")[0] if user.branch else ""
+    branch_map = {
+        "AD": "AD",
+        "CE": "CE",
+        "CSD": "CSD",
+        "CSE": "CSE",
+        "ECE": "ECE",
+        "EEE": "EEE",
+        "IT": "IT",
+        "ME": "ME",
+    }
+    branch_folder = branch_map.get(branch_code, branch_code or "UNKNOWN")
+
+    # Year and batch (batch already inferred/stored in User)
+    year = user.year or "UNKNOWN"
+    batch = (getattr(user, "batch", None) or "A").upper()
+
+    admission_no = user.username or "UNKNOWN"
+
+    return branch_folder, year, batch, admission_no
+
+
+def build_test_print_path(user):
+    """
+    Build a test print path for the student based on their details.
+    This is used only in the exported Excel file as a prototype.
+
+    Example:
+    C:\\TestStudents\\Btech\\CSE\\2023\\A\\ADMSN001\\print
+    """
+    base_path = r"C:\TestStudents\Btech"
+    branch_folder, year, batch, admission_no = test_print_path_parts(user)
+    return rf"{base_path}\{branch_folder}\{year}\{batch}\{admission_no}\print"
+
+
+def requests_export(status, export_format='xlsx', exported_at=None):
+    """
+    Print requests with ``status``, grouped by branch and semester.
+
+    A pending export marks its requests as printed first; pass the
+    ``exported_at`` stamp it used to export exactly those requests. Printed and
+    cancelled exports include the archived requests as well.
+    """
+    def select_requests(model):
+        # Only the columns the export needs
+        return db.select(
+            model.created_at,
+            model.id,
+            User.name,
+            User.semester,
+            User.branch,
+            User.username,
+            User.year,
+            User.batch
+        ).join(User, User.id == model.user_id)
+    
+    if exported_at is not None:
+        if isinstance(exported_at, str):
+            # Queued export jobs carry the stamp as an ISO string
+            exported_at = datetime.fromisoformat(exported_at)
+        statement = select_requests(PrintRequest).where(
+            PrintRequest.status == 'printed',
+            PrintRequest.updated_at == exported_at
+        )
+    else:
+        statement = select_requests(PrintRequest).where(PrintRequest.status == status)
+        if status != 'pending':
+            statement = db.union_all(
+                statement,
+                select_requests(ArchivedPrintRequest).where(ArchivedPrintRequest.status == status)
+            )
+    
+    # Read through a server-side cursor, newest first
+    ordered = statement.subquery()
+    query = db.session.execute(
+        db.select(ordered)
+        .order_by(ordered.c.created_at.desc(), ordered.c.id.desc())
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    
+    columns = REQUEST_EXPORT_COLUMNS
+    
+    def request_rows():
+        for req in query:
+            yield (req.branch, req.semester), [
+                req.created_at.strftime('%d-%m-%Y'),
+                req.name,
+                req.semester,
+                req.branch,
+                req.username,
+                build_test_print_path(req)
+            ]
+    
+    export_format = 'csv' if export_format == 'csv' else 'xlsx'
+    filename = f'print_requests_{status}_{datetime.now().strftime("%Y%m%d")}.{export_format}'
+    return Export(filename, export_format, columns, request_rows(), grouped=True, kind='requests')
+
+
+def students_export(branch='', semester='', status='all', search='', export_format='xlsx'):
+    """Students matching the auth admin's filters, with their verification details."""
+    # Base query: only the columns the sheet needs, with the verifier self-joined
+    Verifier = db.aliased(User)
+    query = db.session.query(
+        User.username,
+        User.name,
+        User.branch,
+        User.semester,
+        User.created_at,
+        User.is_verified,
+        User.verified_at,
+        Verifier.username.label('verifier_username')
+    ).outerjoin(Verifier, Verifier.id == User.verified_by)\
+        .filter(User.role == 'student')
+    
+    # Apply filters
+    if branch:
+        query = query.filter(User.branch == branch)
+    if semester:
+        query = query.filter(User.semester == semester)
+    if status == 'verified':
+        query = query.filter(User.is_verified == True)
+    elif status == 'unverified':
+        query = query.filter(User.is_verified == False)
+    
+    # Apply search
+    if search:
+        query = query.filter(user_search_filter(search))
+    
+    query = query.order_by(User.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    
+    columns = ['Username', 'Name', 'Branch', 'Semester', 'Registered On',
+               'Status', 'Verified On', 'Verified By']
+    
+    def student_rows():
+        for student in query:
+            yield [
+                student.username,
+                student.name,
+                student.branch,
+                student.semester,
+                student.created_at.strftime('%d-%m-%Y %H:%M'),
+                'Verified' if student.is_verified else 'Pending',
+                student.verified_at.strftime('%d-%m-%Y %H:%M') if student.verified_at else '-',
+                student.verifier_username or '-'
+            ]
+    
+    export_format = 'xlsx' if export_format == 'xlsx' else 'csv'
+    filename = f'students_export_{datetime.now().strftime("%Y%m%d_%H%M")}.{export_format}'
+    return Export(filename, export_format, columns, student_rows(), kind='students')
+
+
+def users_export():
+    """Every non-admin account with its request counts, archived requests included."""
+    # Live and archived requests in one derived table; only live ones can be pending
+    all_requests = db.union_all(
+        db.select(PrintRequest.user_id, PrintRequest.status),
+        db.select(ArchivedPrintRequest.user_id, ArchivedPrintRequest.status)
+    ).subquery()
+    
+    # One LEFT JOIN ... GROUP BY with per-status conditional counts
+    rows = db.session.query(
+        User.username,
+        User.role,
+        User.name,
+        User.branch,
+        User.semester,
+        User.is_active,
+        User.created_at,
+        User.last_login,
+        db.func.count(all_requests.c.user_id).label('total_requests'),
+        db.func.count(all_requests.c.user_id).filter(all_requests.c.status == 'pending').label('pending_requests')
+    ).outerjoin(all_requests, all_requests.c.user_id == User.id)\
+        .filter(User.role != 'admin')\
+        .group_by(User.id)\
+        .order_by(User.id)\
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    
+    columns = ['Username', 'Role', 'Name', 'Branch', 'Semester', 'Status',
+               'Created On', 'Last Login', 'Total Requests', 'Pending Requests']
+    
+    def user_rows():
+        for user in rows:
+            yield [
+                user.username,
+                user.role.title(),
+                user.name,
+                user.branch,
+                user.semester,
+                'Active' if user.is_active else 'Inactive',
+                user.created_at.strftime('%d-%m-%Y %H:%M'),
+                user.last_login.strftime('%d-%m-%Y %H:%M') if user.last_login else 'Never',
+                user.total_requests,
+                user.pending_requests
+            ]
+    
+    filename = f'users_export_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx'
+    return Export(filename, 'xlsx', columns, user_rows(), kind='users')
@@ -0,0 +1,441 @@
+import argparse
+import csv
+import io
+import os
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from forms import RegistrationForm
+from models import MAX_CONSECUTIVE_CANCELLATIONS, normalize_search_text
+
+SYNTHETIC_PREFIX = 'synth'
+COPY_CHUNK_ROWS = 50000
+INSERT_CHUNK_ROWS = 5000
+
+FIRST_NAMES = ['Aarav', 'Abhinav', 'Adithya', 'Akhil', 'Alan', 'Anagha', 'Anjali', 'Arjun', 'Athira',
+               'Devika', 'Fathima', 'Gautham', 'Gopika', 'Hari', 'Jithin', 'Keerthana', 'Lakshmi',
+               'Meera', 'Midhun', 'Nandana', 'Nikhil', 'Parvathy', 'Rahul', 'Sandra', 'Sreya',
+               'Vishnu']
+LAST_NAMES = ['Antony', 'Babu', 'George', 'Jose', 'Kumar', 'Menon', 'Nair', 'Pillai', 'Raj',
+              'Thomas', 'Varghese', 'Varma']
+
+# Admission year -> the semesters that batch can be in
+SEMESTERS_BY_YEAR = {'2025': ['S1', 'S2'], '2024': ['S3', 'S4'], '2023': ['S5', 'S6'], '2022': ['S7', 'S8']}
+
+# Finished requests are printed or cancelled; three trailing cancellations block the
+# student and unblocking turns them into 'expired' (see _unblock_students in main.py)
+CANCEL_RATE = 0.12
+
+# Requests per month relative to an average month: busy at semester start and
+# before exams, quiet in the breaks
+MONTH_WEIGHTS = {1: 1.6, 2: 1.2, 3: 1.3, 4: 1.0, 5: 0.4, 6: 0.5,
+                 7: 1.6, 8: 1.4, 9: 1.1, 10: 1.2, 11: 1.3, 12: 0.6}
+SEMESTER_START_MONTHS = (1, 7)
+WEEKDAY_WEIGHTS = (1.0, 1.0, 1.0, 1.0, 0.9, 0.4, 0.1)
+
+# What students leave in their print folders; the last few are not printable
+FILE_TYPES = [('.pdf', 50), ('.docx', 15), ('.doc', 3), ('.txt', 8), ('.jpg', 6), ('.png', 5),
+              ('.jpeg', 2), ('.rtf', 1), ('.xps', 1), ('.bmp', 1),
+              ('.pptx', 3), ('.zip', 2), ('.py', 2), ('.exe', 1)]
+FILE_STEMS = ['assignment', 'lab_record', 'report', 'notes', 'resume', 'seminar', 'project',
+              'question_paper', 'certificate', 'scan']
+
+MINIMAL_PDF = (b'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n'
+               b'2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n'
+               b'3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n'
+               b'trailer<</Root 1 0 R>>\n%%EOF\n')
+
+Student = namedtuple('Student', 'index id username name branch year batch semester')
+
+
+# ---------------------------------------------------------------------------
+# Data
+# ---------------------------------------------------------------------------
+class Dataset:
+    """
+    A deterministic population of students and their print request history.
+
+    Every student's requests come from their own generator seeded with
+    ``(seed, index)``, so the users pass and the requests pass produce the same
+    history without keeping millions of rows in memory.
+    """
+
+    def __init__(self, seed, users, requests, days, prefix, now=None):
+        self.seed = seed
+        self.prefix = prefix
+        self.now = (now or datetime.utcnow()).replace(microsecond=0)
+        self.start = self.now - timedelta(days=days)
+
+        rng = random.Random(seed)
+        self.branches = [code for code, _label in RegistrationForm.branch_choices]
+
+        # Requests per student are heavy-tailed: most print a few times a
+        # semester, a few print every week
+        weights = [rng.lognormvariate(0, 1) for _ in range(users)]
+        scale = requests / sum(weights) if weights else 0
+        self.request_counts = [int(w * scale) + (rng.random() < (w * scale) % 1) for w in weights]
+
+        self.days, self.day_weights = self._day_weights(days)
+
+    def _day_weights(self, days):
+        first_day = self.start.date()
+        dates = [first_day + timedelta(days=offset) for offset in range(days)]
+        cumulative = []
+        total = 0.0
+        for day in dates:
+            weight = MONTH_WEIGHTS[day.month] * WEEKDAY_WEIGHTS[day.weekday()]
+            if day.month in SEMESTER_START_MONTHS and day.day <= 21:
+                weight *= 1.5
+            total += weight
+            cumulative.append(total)
+        return dates, cumulative
+
+    def student(self, index, user_id):
+        rng = random.Random(f'{self.seed}-user-{index}')
+        branch = rng.choice(self.branches)
+        year = rng.choice(list(SEMESTERS_BY_YEAR))
+        return Student(
+            index=index,
+            id=user_id,
+            username=f'{self.prefix}{index:06d}',
+            name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            branch=branch,
+            year=year,
+            batch=branch.split('-')[1] if branch.startswith('CSE-') else 'A',
+            semester=rng.choice(SEMESTERS_BY_YEAR[year])
+        )
+
+    def history(self, index):
+        """
+        ``(created_at, updated_at, status)`` of one student's requests, oldest first,
+        and their trailing cancellation count.
+        """
+        rng = random.Random(f'{self.seed}-requests-{index}')
+        count = self.request_counts[index]
+        days = rng.choices(self.days, cum_weights=self.day_weights, k=count)
+        created = sorted(self._timestamp(rng, day) for day in days)
+
+        requests = []
+        cancelled_run = 0
+        for created_at in created:
+            if cancelled_run >= MAX_CONSECUTIVE_CANCELLATIONS:
+                # Blocked; an admin unblocked them before this request
+                unblocked_at = min(requests[-1][1] + timedelta(days=rng.uniform(0.5, 5)),
+                                   created_at - timedelta(minutes=1))
+                for request in requests[-cancelled_run:]:
+                    request[1] = max(request[1], unblocked_at)
+                    request[2] = 'expired'
+                cancelled_run = 0
+
+            if rng.random() < CANCEL_RATE:
+                # Cancelled by the student within the hour
+                requests.append([created_at, created_at + timedelta(minutes=rng.randint(1, 60)), 'cancelled'])
+                cancelled_run += 1
+            else:
+                # Printed with the next faculty export, usually the same day
+                printed_at = created_at + timedelta(hours=rng.lognormvariate(1, 1))
+                requests.append([created_at, printed_at, 'printed'])
+                cancelled_run = 0
+
+        # A few students are waiting in the queue right now
+        if cancelled_run < MAX_CONSECUTIVE_CANCELLATIONS and rng.random() < 0.02:
+            created_at = self.now - timedelta(seconds=rng.randint(60, 48 * 3600))
+            if not requests or created_at > requests[-1][0]:
+                requests.append([created_at, created_at, 'pending'])
+
+        for request in requests:
+            request[1] = min(request[1], self.now)
+        return requests, cancelled_run
+
+    def _timestamp(self, rng, day):
+        hour = min(max(rng.gauss(12.5, 2.5), 8), 18.99)
+        created_at = datetime(day.year, day.month, day.day) + timedelta(
+            hours=hour, seconds=rng.randint(0, 59))
+        return min(created_at, self.now - timedelta(minutes=1))
+
+    def user_rows(self, first_user_id, password_hash):
+        for index in range(len(self.request_counts)):
+            student = self.student(index, first_user_id + index)
+            requests, cancelled_run = self.history(index)
+            rng = random.Random(f'{self.seed}-account-{index}')
+            yield {
+                'id': student.id,
+                'username': student.username,
+                'password_hash': password_hash,
+                'role': 'student',
+                'name': student.name,
+                'branch': student.branch,
+                'year': student.year,
+                'batch': student.batch,
+                'semester': student.semester,
+                'is_active': True,
+                'is_verified': True,
+                'created_at': self.start - timedelta(days=rng.uniform(0, 180)),
+                'last_login': requests[-1][0] if requests else None,
+                'consecutive_cancellations': cancelled_run,
+                'is_blocked': cancelled_run >= MAX_CONSECUTIVE_CANCELLATIONS,
+                'username_search': normalize_search_text(student.username),
+                'name_search': normalize_search_text(student.name),
+            }
+
+    def request_rows(self, first_user_id, first_request_id):
+        # Ids follow the students, not the timeline; keyset pages order by created_at first
+        request_id = first_request_id
+        for index in range(len(self.request_counts)):
+            requests, _cancelled_run = self.history(index)
+            for created_at, updated_at, status in requests:
+                yield {
+                    'id': request_id,
+                    'user_id': first_user_id + index,
+                    'status': status,
+                    'created_at': created_at,
+                    'updated_at': updated_at,
+                }
+                request_id += 1
+
+
+# ---------------------------------------------------------------------------
+# Bulk load
+# ---------------------------------------------------------------------------
+def bulk_load(table, rows):
+    """COPY ``rows`` into ``table`` on PostgreSQL, chunked executemany elsewhere. Returns the row count."""
+    from models import db
+
+    columns = None
+    loaded = 0
+    chunk = []
+    chunk_size = COPY_CHUNK_ROWS if db.engine.dialect.name == 'postgresql' else INSERT_CHUNK_ROWS
+    for row in rows:
+        if columns is None:
+            # Only the columns this schema has
+            columns = [name for name in row if name in table.c]
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            loaded += _load_chunk(table, columns, chunk)
+            chunk = []
+    if chunk:
+        loaded += _load_chunk(table, columns, chunk)
+    return loaded
+
+
+def _load_chunk(table, columns, rows):
+    from models import db
+
+    if db.engine.dialect.name != 'postgresql':
+        with db.engine.begin() as connection:
+            connection.execute(table.insert(), [{name: row[name] for name in columns} for row in rows])
+        return len(rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for row in rows:
+        writer.writerow([_copy_value(row[name]) for name in columns])
+    buffer.seek(0)
+
+    connection = db.engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {table.name} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+        connection.commit()
+    finally:
+        connection.close()
+    return len(rows)
+
+
+def _copy_value(value):
+    # Unquoted empty fields are NULL in COPY's CSV format
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+def next_id(*columns):
+    from models import db
+
+    return max(db.session.query(db.func.coalesce(db.func.max(column), 0)).scalar()
+               for column in columns) + 1
+
+
+def purge(prefix):
+    """Delete an earlier run's students (and their requests) before loading again."""
+    from models import db, User, PrintRequest, ArchivedPrintRequest
+
+    user_ids = db.select(User.id).where(User.username.like(f'{prefix}%'))
+    for model in (PrintRequest, ArchivedPrintRequest):
+        db.session.execute(db.delete(model).where(model.user_id.in_(user_ids)))
+    deleted = db.session.execute(db.delete(User).where(User.username.like(f'{prefix}%'))).rowcount
+    db.session.commit()
+    return deleted
+
+
+def load_database(app, dataset, password):
+    from hashing import hash_password
+    from models import db, User, PrintRequest, ArchivedPrintRequest
+
+    with app.app_context():
+        db.create_all()
+
+        if db.session.query(User.id).filter(User.username.like(f'{dataset.prefix}%')).first():
+            raise SystemExit(f'Students named {dataset.prefix}* already exist; run with --purge '
+                             f'to replace them or pick another --prefix')
+
+        # Explicit ids so requests can reference their students without a lookup
+        first_user_id = next_id(User.id)
+        # Archived requests keep their ids, so new ones must not reuse them either
+        first_request_id = next_id(PrintRequest.id, ArchivedPrintRequest.id)
+        db.session.commit()
+
+        started = time.monotonic()
+        users = bulk_load(User.__table__, dataset.user_rows(first_user_id, hash_password(password)))
+        print(f'{users} users loaded in {time.monotonic() - started:.1f}s')
+
+        started = time.monotonic()
+        requests = bulk_load(PrintRequest.__table__, dataset.request_rows(first_user_id, first_request_id))
+        print(f'{requests} print requests loaded in {time.monotonic() - started:.1f}s')
+
+        if db.engine.dialect.name == 'postgresql':
+            with db.engine.begin() as connection:
+                # The serial sequences did not see the explicit ids
+                for table in ('users', 'print_requests'):
+                    connection.execute(db.text(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                        f"(SELECT max(id) FROM {table}))"))
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                connection.execute(db.text('ANALYZE users'))
+                connection.execute(db.text('ANALYZE print_requests'))
+
+        return first_user_id
+
+
+# ---------------------------------------------------------------------------
+# Workbooks and print folders
+# ---------------------------------------------------------------------------
+def local_print_path(files_root, student):
+    """Where the folder tree keeps a student's print folder, laid out like build_test_print_path."""
+    from exports import test_print_path_parts
+
+    return os.path.join(files_root, *test_print_path_parts(student), 'print')
+
+
+def write_workbooks(dataset, count, rows, out_dir, files_root, first_user_id):
+    """
+    Pending-queue exports as the faculty would download them: ``rows`` distinct
+    students each, newest first, one sheet per branch and semester. Returns the
+    students that appear in any workbook.
+    """
+    from exports import Export, REQUEST_EXPORT_COLUMNS
+
+    rng = random.Random(f'{dataset.seed}-workbooks')
+    population = len(dataset.request_counts)
+    exported = {}
+    for number in range(1, count + 1):
+        indexes = rng.sample(range(population), min(rows, population))
+        queued = sorted(((dataset.now - timedelta(seconds=rng.randint(60, 72 * 3600)), index)
+                         for index in indexes), reverse=True)
+
+        def workbook_rows():
+            for created_at, index in queued:
+                student = dataset.student(index, first_user_id + index)
+                exported[index] = student
+                yield (student.branch, student.semester), [
+                    created_at.strftime('%d-%m-%Y'),
+                    student.name,
+                    student.semester,
+                    student.branch,
+                    student.username,
+                    local_print_path(files_root, student)
+                ]
+
+        path = os.path.join(out_dir, f'print_requests_pending_{number:02d}.xlsx')
+        export = Export(os.path.basename(path), 'xlsx', REQUEST_EXPORT_COLUMNS, workbook_rows(),
+                        grouped=True, kind='requests')
+        with open(path, 'wb') as f:
+            export.write(f)
+        print(f'{path}: {len(queued)} requests')
+    return list(exported.values())
+
+
+def write_print_folders(dataset, students, files_root):
+    """
+    A print folder with mixed files for each student. Like the real share, a few
+    students never created their folder and a few left it empty.
+    """
+    extensions = [extension for extension, _weight in FILE_TYPES]
+    weights = [weight for _extension, weight in FILE_TYPES]
+    files = missing = empty = 0
+    for student in students:
+        rng = random.Random(f'{dataset.seed}-folder-{student.index}')
+        roll = rng.random()
+        if roll < 0.03:
+            missing += 1
+            continue
+        folder = local_print_path(files_root, student)
+        os.makedirs(folder, exist_ok=True)
+        if roll < 0.08:
+            empty += 1
+            continue
+        for number in range(max(1, round(rng.lognormvariate(0.7, 0.6)))):
+            extension = rng.choices(extensions, weights=weights)[0]
+            name = f'{rng.choice(FILE_STEMS)}_{number + 1}{extension}'
+            with open(os.path.join(folder, name), 'wb') as f:
+                f.write(_file_content(rng, extension))
+            files += 1
+    print(f'{files_root}: {len(students) - missing} print folders ({empty} empty, '
+          f'{missing} missing), {files} files')
+
+
+def _file_content(rng, extension):
+    if extension == '.pdf':
+        return MINIMAL_PDF
+    if extension in ('.txt', '.rtf', '.py'):
+        return ' '.join(rng.choice(FILE_STEMS) for _ in range(rng.randint(20, 400))).encode()
+    # Binary formats only need a plausible size for copy/scan benchmarks
+    return os.urandom(rng.randint(2, 512) * 1024)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Generate a seeded synthetic dataset: students and print request history '
+                    'loaded in bulk, pending-queue workbooks and the matching print folder tree.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=2000000, help='Approximate total')
+    parser.add_argument('--days', type=int, default=730, help='History window ending now')
+    parser.add_argument('--prefix', default=SYNTHETIC_PREFIX, help='Username prefix of the students')
+    parser.add_argument('--password', default='synthetic-password')
+    parser.add_argument('--config', default='development')
+    parser.add_argument('--purge', action='store_true', help='Delete students of an earlier run first')
+    parser.add_argument('--no-db', action='store_true', help='Only write workbooks and folders')
+    parser.add_argument('--workbooks', type=int, default=3)
+    parser.add_argument('--workbook-rows', type=int, default=2000)
+    parser.add_argument('--out-dir', default='dataset')
+    parser.add_argument('--files-root', help='Print folder tree root (default: <out-dir>/TestStudents/Btech)')
+    args = parser.parse_args()
+
+    dataset = Dataset(args.seed, args.users, args.requests, args.days, args.prefix)
+    first_user_id = 1
+
+    if not args.no_db:
+        # Read by config.py, so set before the app is imported
+        os.environ.setdefault('EXPORT_WORKER_THREADS', '0')
+        from main import create_app
+
+        app = create_app(args.config)
+        if args.purge:
+            with app.app_context():
+                print(f'{purge(args.prefix)} earlier {args.prefix}* students deleted')
+        first_user_id = load_database(app, dataset, args.password)
+        print('Run `flask archive-requests --days 180` to move the older history into the archive table.')
+
+    files_root = os.path.abspath(args.files_root or os.path.join(args.out_dir, 'TestStudents', 'Btech'))
+    os.makedirs(args.out_dir, exist_ok=True)
+    students = write_workbooks(dataset, args.workbooks, args.workbook_rows, args.out_dir,
+                               files_root, first_user_id)
+    write_print_folders(dataset, students, files_root)
@@ -0,0 +1,29 @@
+import glob
+import os
+import tempfile
+
+# Picked up automatically by `gunicorn` when started from this directory.
+# See the README for the full command line.
+
+# Prometheus multiprocess mode: every worker writes its metric samples to files
+# in this directory and /metrics on any worker aggregates all of them. Must be
+# set before the app (and prometheus_client) is imported in the workers.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                      os.path.join(tempfile.gettempdir(), 'printpal-metrics'))
+
+
+def on_starting(server):
+    # Samples left by a previous run would be added to this one's
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    # Drop the live gauges (e.g. checked-out connections) of a worker that exited
+    try:
+        from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+    except ImportError:
+        return
+    GunicornInternalPrometheusMetrics.mark_process_dead_on_child_exit(worker.pid)
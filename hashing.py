@@ -0,0 +1,94 @@
+import os
+import threading
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_HASH_METHOD = 'scrypt:32768:8:1'
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool queue is full or a hash takes too long."""
+
+
+_executor = None
+_executor_pid = None
+_slots = None
+_executor_lock = threading.Lock()
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def hash_method():
+    """The configured Werkzeug hash method, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'."""
+    return _config('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+
+
+def _get_executor():
+    """Return this process's hashing pool, creating it after a fork if needed."""
+    global _executor, _executor_pid, _slots
+
+    pool_size = _config('PASSWORD_HASH_POOL_SIZE', 0)
+    if pool_size <= 0:
+        return None, None
+
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executor = ProcessPoolExecutor(max_workers=pool_size)
+                # Hashes running in the pool plus hashes allowed to wait for it
+                _slots = threading.BoundedSemaphore(pool_size + _config('PASSWORD_HASH_QUEUE_SIZE', 0))
+                _executor_pid = os.getpid()
+    return _executor, _slots
+
+
+def _run(func, *args):
+    executor, slots = _get_executor()
+    if executor is None:
+        return func(*args)
+
+    timeout = _config('PASSWORD_HASH_TIMEOUT', 10)
+    if not slots.acquire(timeout=timeout):
+        raise PasswordHashingBusy('Password hashing queue is full')
+    try:
+        future = executor.submit(func, *args)
+    except Exception:
+        slots.release()
+        raise
+    # The slot is freed when the hash finishes, not when we stop waiting for it,
+    # so timed-out hashes still count against the queue
+    future.add_done_callback(lambda _future: slots.release())
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise PasswordHashingBusy('Password hashing timed out')
+
+
+def hash_password(password):
+    """Hash a password with the configured method, off the request thread when a pool is configured."""
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(password_hash, password):
+    """Check a password against its stored hash, off the request thread when a pool is configured."""
+    return _run(check_password_hash, password_hash, password)
+
+
+@lru_cache(maxsize=None)
+def stored_method(method):
+    """
+    ``method`` as Werkzeug writes it into hashes, with every default spelled out,
+    e.g. 'pbkdf2:sha256' -> 'pbkdf2:sha256:1000000'. One throwaway hash per method.
+    """
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def needs_rehash(password_hash):
+    """True if the stored hash was made with different parameters than the configured method."""
+    return password_hash.split('$', 1)[0] != stored_method(hash_method())
@@ -1,22 +1,77 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify
+from flask import (Flask, Response, render_template, request, redirect, url_for, flash, jsonify,
+                   stream_with_context)
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_wtf.csrf import CSRFProtect
 from datetime import datetime
 import os
-import pandas as pd
-import io
+import click
 from flask_wtf import FlaskForm
 
-from models import db, User, PrintRequest, SystemStatus
+from models import (db, User, PrintRequest, ArchivedPrintRequest, SystemStatus, ExportJob,
+                    MAX_CONSECUTIVE_CANCELLATIONS, submit_print_request)
 from forms import LoginForm, RegistrationForm, ProfileUpdateForm, PasswordChangeForm
-from utils import setup_logging, init_limiter, login_limit
+from hashing import PasswordHashingBusy
+from utils import setup_logging, setup_template_cache, init_limiter, login_limit
+from metrics import init_metrics
+from query_budget import init_query_budget
+from engine_profiles import start_connect_warmup
+from pagination import paginate_requests
+from exports import requests_export, students_export, users_export
+from export_jobs import enqueue_export, retry_job, run_worker, start_export_worker, stream_file
+from archive import archive_old_requests
+from search import user_search_filter
+from cache import (get_system_status, update_system_status_cache, get_dashboard_stats,
+                   invalidate_dashboard_stats, publish_invalidation, start_invalidation_listener,
+                   load_cached_user)
+from events import broker, publish_request_event, event_stream
+from queue_api import (request_list_etag, pending_queue_version, print_history_version,
+                       student_requests_version, serialize_page)
 from config import config
 
 # Initialize extensions
 login_manager = LoginManager()
 csrf = CSRFProtect()
 
-def create_app(config_name='default'):
+def bootstrap_database():
+    """
+    Create the tables, default accounts and initial system status if missing.
+    
+    Returns True if anything was created.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        # Needed by the trigram search indexes on users
+        db.session.execute(db.text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        db.session.commit()
+    db.create_all()
+    created = False
+    
+    # Create default admin account if it doesn't exist
+    admin = User.query.filter_by(username='admin').first()
+    if not admin:
+        admin = User(username='admin', role='admin', name='Administrator')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        created = True
+    
+    # Create default faculty account if it doesn't exist
+    faculty = User.query.filter_by(username='faculty1').first()
+    if not faculty:
+        faculty = User(username='faculty1', role='faculty', name='Faculty Member')
+        faculty.set_password('adminpass')
+        db.session.add(faculty)
+        created = True
+        
+    # Create initial system status if it doesn't exist
+    status = SystemStatus.query.first()
+    if not status:
+        status = SystemStatus(is_active=True)
+        db.session.add(status)
+        created = True
+        
+    db.session.commit()
+    return created
+
+def create_app(config_name='default', bootstrap=None):
     app = Flask(__name__)
     
     # Load config
@@ -28,38 +83,63 @@ def create_app(config_name='default'):
     csrf.init_app(app)
     init_limiter(app)
     setup_logging(app)
+    setup_template_cache(app)
+    init_metrics(app)
+    init_query_budget(app)
+    # After the metrics, whose pool listeners must see the warm-up checkout
+    if app.config.get('DB_CONNECT_WARMUP'):
+        start_connect_warmup(app)
 
-    def _build_test_print_path(user):
+    def _unblock_students():
         """
-        Build a test print path for the student based on their details.
-        This is used only in the exported Excel file as a prototype.
+        Lift every student block in a constant number of statements.
+
+        A student is blocked when their latest MAX_CONSECUTIVE_CANCELLATIONS requests
+        are all cancelled. Those requests are ranked with ROW_NUMBER() per user and
+        the blocking ones are set to 'expired' in a single UPDATE.
 
-        Example:
-        C:\\TestStudents\\Btech\\CSE\\2023\\A\\ADMSN001\\print
+        Returns the number of students that were unblocked.
         """
-        base_path = r"C:\TestStudents\Btech"
-
-        # Derive branch folder from stored branch code
-        branch_code = (user.branch or "").split("-")[0] if user.branch else ""
-        branch_map = {
-            "AD": "AD",
-            "CE": "CE",
-            "CSD": "CSD",
-            "CSE": "CSE",
-            "ECE": "ECE",
-            "EEE": "EEE",
-            "IT": "IT",
-            "ME": "ME",
-        }
-        branch_folder = branch_map.get(branch_code, branch_code or "UNKNOWN")
+        limit = MAX_CONSECUTIVE_CANCELLATIONS
+        ranked = db.select(
+            PrintRequest.id,
+            PrintRequest.user_id,
+            PrintRequest.status,
+            db.func.row_number().over(
+                partition_by=PrintRequest.user_id,
+                order_by=(PrintRequest.created_at.desc(), PrintRequest.id.desc())
+            ).label('rn')
+        ).join(User, User.id == PrintRequest.user_id)\
+            .where(User.role == 'student')\
+            .cte('ranked')
 
-        # Year and batch (batch already inferred/stored in User)
-        year = user.year or "UNKNOWN"
-        batch = (getattr(user, "batch", None) or "A").upper()
+        blocked_users = db.select(ranked.c.user_id)\
+            .where(ranked.c.rn <= limit)\
+            .group_by(ranked.c.user_id)\
+            .having(db.func.count(db.case((ranked.c.status == 'cancelled', 1))) == limit)
 
-        admission_no = user.username or "UNKNOWN"
+        expired_user_ids = db.session.execute(
+            db.update(PrintRequest)
+            .where(PrintRequest.id.in_(
+                db.select(ranked.c.id).where(
+                    ranked.c.rn <= limit,
+                    ranked.c.status == 'cancelled',
+                    ranked.c.user_id.in_(blocked_users)
+                )
+            ))
+            .values(status='expired', updated_at=datetime.utcnow())
+            .returning(PrintRequest.user_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
 
-        return rf"{base_path}\{branch_folder}\{year}\{batch}\{admission_no}\print"
+        unblocked_ids = set(expired_user_ids)
+        db.session.execute(
+            db.update(User)
+            .where(db.or_(User.id.in_(unblocked_ids), User.is_blocked == db.true()))
+            .values(consecutive_cancellations=0, is_blocked=False)
+            .execution_options(synchronize_session=False)
+        )
+        return len(unblocked_ids)
     
     # Setup login manager
     login_manager.login_view = 'login'
@@ -67,24 +147,33 @@ def create_app(config_name='default'):
     
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return load_cached_user(int(user_id))
     
+    def _live_events_enabled():
+        """Whether the current user's dashboard may hold an SSE stream rather than poll."""
+        if not app.config['SSE_ENABLED'] or not current_user.is_authenticated:
+            return False
+        return current_user.is_faculty() or (current_user.is_student() and app.config['SSE_STUDENTS'])
+
     # Context processors
     @app.context_processor
     def utility_processor():
         return {
             'now': datetime.now(),
+            # Export links queue background jobs only when a worker will run them
+            'export_jobs_enabled': app.config.get('EXPORT_JOBS_ENABLED', False),
+            'live_events_enabled': _live_events_enabled,
             'format_date': lambda date: date.strftime('%d-%m-%Y %H:%M') if date else ''
         }
         
     @app.context_processor
     def inject_system_status():
-        status = SystemStatus.query.first()
-        if not status:
-            status = SystemStatus(is_active=True)
-            db.session.add(status)
-            db.session.commit()
-        return dict(system_status=status)
+        return dict(system_status=get_system_status())
+        
+    @app.before_request
+    def start_cache_listener():
+        start_invalidation_listener(app)
+        start_export_worker(app)
         
     # Add cache headers for static files
     @app.after_request
@@ -190,15 +279,15 @@ def create_app(config_name='default'):
             return redirect(url_for('index'))
         
         # Check service status
-        system_status = SystemStatus.query.first()
-        service_active = system_status.is_active if system_status else True
+        service_active = get_system_status().is_active
         
-        page = request.args.get('page', 1, type=int)
         per_page = 10
         
-        user_requests = PrintRequest.query.filter_by(user_id=current_user.id)\
-            .order_by(PrintRequest.created_at.desc())\
-            .paginate(page=page, per_page=per_page)
+        user_requests = paginate_requests(
+            PrintRequest.query.filter_by(user_id=current_user.id),
+            per_page,
+            archive_query=ArchivedPrintRequest.query.filter_by(user_id=current_user.id)
+        )
             
         # Check if user has any pending request
         has_pending_request = PrintRequest.query.filter_by(
@@ -206,16 +295,10 @@ def create_app(config_name='default'):
             status='pending'
         ).first() is not None
 
-        # Get count of consecutive cancelled requests
+        # Get count of consecutive cancelled requests (a pending request breaks the run)
         cancelled_count = 0
-        recent_requests = PrintRequest.query.filter_by(user_id=current_user.id)\
-            .order_by(PrintRequest.created_at.desc()).limit(3).all()
-            
-        for req in recent_requests:
-            if req.status == 'cancelled':
-                cancelled_count += 1
-            else:
-                break
+        if not has_pending_request:
+            cancelled_count = min(current_user.consecutive_cancellations, MAX_CONSECUTIVE_CANCELLATIONS)
 
         return render_template('student_dashboard.html',
                              requests=user_requests,
@@ -230,45 +313,35 @@ def create_app(config_name='default'):
             flash('Access denied.', 'error')
             return redirect(url_for('index'))
 
-        # Check if service is active
-        system_status = SystemStatus.query.first()
-        if system_status and not system_status.is_active:
-            flash('Print service is currently unavailable.', 'error')
-            return redirect(url_for('student_dashboard'))
-        
         try:
-            # Check for pending requests
-            pending_request = PrintRequest.query.filter_by(
-                user_id=current_user.id,
-                status='pending'
-            ).first()
-
-            if pending_request:
-                flash('You already have a pending request. Please wait for it to be processed.', 'error')
-                return redirect(url_for('student_dashboard'))
-
-            # Check for consecutive cancelled requests
-            recent_requests = PrintRequest.query.filter_by(
-                user_id=current_user.id
-            ).order_by(PrintRequest.created_at.desc()).limit(3).all()
+            # Service, block and pending checks all happen inside this one INSERT
+            new_request = submit_print_request(current_user.id)
             
-            cancelled_count = 0
-            for req in recent_requests:
-                if req.status == 'cancelled':
-                    cancelled_count += 1
+            if new_request is None:
+                db.session.rollback()
+                # Rare path: work out which condition stopped the insert
+                status = SystemStatus.query.order_by(SystemStatus.id).first()
+                if status and not status.is_active:
+                    flash('Print service is currently unavailable.', 'error')
+                elif PrintRequest.query.filter_by(user_id=current_user.id, status='pending').first():
+                    flash('You already have a pending request. Please wait for it to be processed.', 'error')
                 else:
-                    break
-
-            if cancelled_count >= 3:
-                flash('You have cancelled too many consecutive requests. Please wait for faculty assistance.', 'error')
+                    flash('You have cancelled too many consecutive requests. Please wait for faculty assistance.', 'error')
                 return redirect(url_for('student_dashboard'))
 
-            # Create new request
-            new_request = PrintRequest(user_id=current_user.id)
-            db.session.add(new_request)
+            publish_request_event('created', [(new_request.id, current_user.id)],
+                                  created_at=new_request.created_at.isoformat(),
+                                  student={
+                                      'name': current_user.name,
+                                      'username': current_user.username,
+                                      'branch': current_user.branch,
+                                      'semester': current_user.semester
+                                  })
+            # Read before commit expires current_user, which would cost a reload
+            username = current_user.username
             db.session.commit()
             
-            app.logger.info(f'New print request created by user: {current_user.username}')
+            app.logger.info(f'New print request created by user: {username}')
             flash('Print request submitted successfully!', 'success')
 
         except Exception as e:
@@ -296,6 +369,8 @@ def create_app(config_name='default'):
                 return redirect(url_for('student_dashboard'))
             
             print_request.status = 'cancelled'
+            current_user.record_cancellation()
+            publish_request_event('cancelled', [print_request])
             db.session.commit()
             
             app.logger.info(f'Print request {request_id} cancelled by user: {current_user.username}')
@@ -315,7 +390,6 @@ def create_app(config_name='default'):
             flash('Access denied.', 'error')
             return redirect(url_for('index'))
             
-        page = request.args.get('page', 1, type=int)
         per_page = 10
         search_username = request.args.get('username', '').strip()
         
@@ -326,15 +400,13 @@ def create_app(config_name='default'):
         
         # Add search filter if username provided
         if search_username:
-            query = query.filter(User.username.ilike(f'%{search_username}%'))
+            query = query.filter(user_search_filter(search_username, include_name=False))
         
-        # Get pending requests with search filter
-        pending_requests = query\
-            .order_by(PrintRequest.created_at.desc())\
-            .paginate(page=page, per_page=per_page)
+        # Get pending requests with search filter; the template shows each student's details
+        pending_requests = paginate_requests(query.options(db.contains_eager(PrintRequest.user)), per_page)
             
         # Get system status
-        system_status = SystemStatus.query.first()
+        system_status = get_system_status()
         
         # Create form for CSRF protection
         form = FlaskForm()
@@ -345,6 +417,132 @@ def create_app(config_name='default'):
                              system_status=system_status,
                              form=form)
 
+    def _apply_bulk_action(status, request_ids=None, search_username=''):
+        """
+        Move pending requests to ``status`` in one UPDATE ... RETURNING.
+
+        Targets the given ids, or every pending request matching the dashboard
+        search when ``request_ids`` is None. Only rows still pending are touched,
+        so concurrent single-row actions are never overwritten. Returns the
+        (id, user_id) rows that were updated.
+        """
+        statement = db.update(PrintRequest).where(PrintRequest.status == 'pending')
+        if request_ids is not None:
+            statement = statement.where(PrintRequest.id.in_(request_ids))
+        if search_username:
+            statement = statement.where(PrintRequest.user_id.in_(
+                db.select(User.id).where(user_search_filter(search_username, include_name=False))
+            ))
+        
+        updated = db.session.execute(
+            statement
+            .values(status=status, updated_at=datetime.utcnow())
+            .returning(PrintRequest.id, PrintRequest.user_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        
+        per_user = {}
+        for _, user_id in updated:
+            per_user[user_id] = per_user.get(user_id, 0) + 1
+        
+        if status == 'printed':
+            # A printed request ends any run of cancellations
+            if per_user:
+                User.query.filter(User.id.in_(per_user))\
+                    .update({'consecutive_cancellations': 0, 'is_blocked': False}, synchronize_session=False)
+        else:
+            # Same SQL-side increment as User.record_cancellation, one UPDATE per distinct count
+            by_count = {}
+            for user_id, count in per_user.items():
+                by_count.setdefault(count, []).append(user_id)
+            for count, user_ids in by_count.items():
+                User.query.filter(User.id.in_(user_ids))\
+                    .update({
+                        'consecutive_cancellations': User.consecutive_cancellations + count,
+                        'is_blocked': User.consecutive_cancellations + count >= MAX_CONSECUTIVE_CANCELLATIONS
+                    }, synchronize_session=False)
+        
+        publish_request_event(status, updated)
+        return updated
+
+    @app.route('/faculty/bulk-action', methods=['POST'])
+    @login_required
+    def bulk_action():
+        wants_json = request.is_json or request.accept_mimetypes.best == 'application/json'
+        if not current_user.is_faculty():
+            if wants_json:
+                return jsonify({'status': 'error', 'message': 'Access denied.'}), 403
+            flash('Access denied.', 'error')
+            return redirect(url_for('index'))
+        
+        if request.is_json:
+            data = request.get_json(silent=True) or {}
+        else:
+            data = request.form
+        action = data.get('action')
+        search_username = (data.get('username') or '').strip()
+        all_matching = str(data.get('all_matching', '')).lower() in ('1', 'true', 'on')
+        
+        if action not in ('printed', 'cancelled'):
+            if wants_json:
+                return jsonify({'status': 'error', 'message': 'Invalid action.'}), 400
+            flash('Invalid action.', 'error')
+            return redirect(url_for('faculty_dashboard', username=search_username or None))
+        
+        request_ids = None
+        if not all_matching:
+            raw_ids = data.get('request_ids', []) if request.is_json else request.form.getlist('request_ids')
+            try:
+                request_ids = sorted({int(request_id) for request_id in raw_ids})
+            except (TypeError, ValueError):
+                request_ids = []
+            if not request_ids:
+                if wants_json:
+                    return jsonify({'status': 'error', 'message': 'No requests selected.'}), 400
+                flash('No requests selected.', 'error')
+                return redirect(url_for('faculty_dashboard', username=search_username or None))
+        
+        try:
+            updated = _apply_bulk_action(action, request_ids, search_username)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f'Bulk mark {action} failed: {str(e)}')
+            if wants_json:
+                return jsonify({'status': 'error', 'message': 'Failed to update requests.'}), 500
+            flash('Failed to update requests. Please try again.', 'error')
+            return redirect(url_for('faculty_dashboard', username=search_username or None))
+        
+        updated_ids = {request_id for request_id, _ in updated}
+        results = {request_id: 'updated' for request_id in updated_ids}
+        skipped_ids = [request_id for request_id in request_ids or [] if request_id not in updated_ids]
+        if skipped_ids:
+            current_status = dict(
+                db.session.query(PrintRequest.id, PrintRequest.status)
+                .filter(PrintRequest.id.in_(skipped_ids))
+                .all()
+            )
+            for request_id in skipped_ids:
+                status = current_status.get(request_id)
+                results[request_id] = f'already {status}' if status else 'not found'
+        
+        app.logger.info(f'{len(updated_ids)} requests marked as {action} in bulk by {current_user.username}')
+        
+        if wants_json:
+            return jsonify({
+                'status': 'success',
+                'action': action,
+                'updated': len(updated_ids),
+                'skipped': len(skipped_ids),
+                'results': {str(request_id): result for request_id, result in sorted(results.items())}
+            })
+        
+        message = f'{len(updated_ids)} request{"s" if len(updated_ids) != 1 else ""} marked as {action}.'
+        if skipped_ids:
+            message += f' {len(skipped_ids)} skipped because they were not pending.'
+        flash(message, 'success' if updated_ids else 'info')
+        return redirect(url_for('faculty_dashboard', username=search_username or None))
+
     @app.route('/faculty/mark-printed/<int:request_id>')
     @login_required
     def mark_printed(request_id):
@@ -354,8 +552,20 @@ def create_app(config_name='default'):
 
         print_request = PrintRequest.query.get_or_404(request_id)
         print_request.status = 'printed'
+        # Printing the student's newest request ends their run of cancellations;
+        # printing an older one only ends the part of the run older than it
+        newer_request = PrintRequest.query\
+            .filter(PrintRequest.user_id == print_request.user_id,
+                    db.tuple_(PrintRequest.created_at, PrintRequest.id) >
+                    db.tuple_(print_request.created_at, print_request.id))\
+            .first()
+        if newer_request is None:
+            print_request.user.reset_cancellations()
+        else:
+            print_request.user.recount_cancellations()
         
         try:
+            publish_request_event('printed', [print_request])
             db.session.commit()
             app.logger.info(f'Print request {request_id} marked as printed by faculty: {current_user.username}')
             flash('Request marked as printed!', 'success')
@@ -366,6 +576,66 @@ def create_app(config_name='default'):
             
         return redirect(url_for('faculty_dashboard'))
 
+    def _mark_pending_exported():
+        """
+        Mark every pending request as printed for a pending export, without committing.
+
+        Returns (exported_at, exported_count, unblocked_count); the export then
+        selects its rows by the exported_at stamp.
+        """
+        exported_at = datetime.utcnow()
+        exported_count = PrintRequest.query.filter_by(status='pending')\
+            .update({'status': 'printed', 'updated_at': exported_at}, synchronize_session=False)
+        if not exported_count:
+            return exported_at, 0, 0
+        
+        # A printed request ends any run of cancellations
+        exported_user_ids = db.select(PrintRequest.user_id).where(
+            PrintRequest.status == 'printed',
+            PrintRequest.updated_at == exported_at
+        )
+        publish_request_event('printed', db.session.query(PrintRequest.id, PrintRequest.user_id).filter(
+            PrintRequest.status == 'printed',
+            PrintRequest.updated_at == exported_at
+        ))
+        User.query.filter(User.id.in_(exported_user_ids))\
+            .update({'consecutive_cancellations': 0, 'is_blocked': False}, synchronize_session=False)
+        
+        # Expire the cancellations of every blocked student in bulk
+        unblocked_count = _unblock_students()
+        return exported_at, exported_count, unblocked_count
+
+    @app.route('/events/requests')
+    @login_required
+    def request_events():
+        if current_user.is_faculty():
+            user_id = None
+        elif current_user.is_student():
+            user_id = current_user.id
+        else:
+            return jsonify({'status': 'error', 'message': 'Access denied.'}), 403
+
+        # 204 and 503 make EventSource give up; the dashboard then polls the JSON request list
+        if not _live_events_enabled():
+            return app.response_class(status=204)
+        subscriber = broker.subscribe(limit=app.config['SSE_MAX_STREAMS'])
+        if subscriber is None:
+            app.logger.warning(f'SSE stream refused for {current_user.username}: '
+                               f'{app.config["SSE_MAX_STREAMS"]} streams already open')
+            return app.response_class(status=503, headers={'Retry-After': '60'})
+
+        # The stream holds no database connection; events arrive through the in-process broker
+        stream = event_stream(
+            subscriber,
+            user_id,
+            keepalive=app.config['SSE_KEEPALIVE_INTERVAL'],
+            max_duration=app.config['SSE_MAX_STREAM_SECONDS']
+        )
+        return Response(stream, mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+
     @app.route('/faculty/export-requests')
     @login_required
     def export_requests():
@@ -378,140 +648,137 @@ def create_app(config_name='default'):
             flash('Invalid status specified.', 'error')
             return redirect(url_for('faculty_dashboard'))
         
-        MAX_EXPORT_RECORDS = 1000
-        
-        requests = PrintRequest.query\
-            .join(User)\
-            .filter(PrintRequest.status == status)\
-            .order_by(PrintRequest.created_at.desc())\
-            .limit(MAX_EXPORT_RECORDS)\
-            .all()
-        
-        if not requests:
-            flash(f'No {status} requests found to export.', 'info')
-            return redirect(url_for('faculty_dashboard'))
+        export_format = request.args.get('format', 'xlsx')
+        exported_at = None
         
         # Mark as printed if pending
         if status == 'pending':
             try:
-                for req in requests:
-                    req.status = 'printed'
-                    req.updated_at = datetime.utcnow()
-                
-                # Find all students with consecutive cancelled requests
-                students_with_blocks = User.query.filter_by(role='student').all()
-                unblocked_count = 0
+                exported_at, exported_count, unblocked_count = _mark_pending_exported()
                 
-                for student in students_with_blocks:
-                    recent_requests = PrintRequest.query.filter_by(user_id=student.id)\
-                        .order_by(PrintRequest.created_at.desc()).limit(3).all()
-                    
-                    cancelled_count = 0
-                    for req in recent_requests:
-                        if req.status == 'cancelled':
-                            cancelled_count += 1
-                        else:
-                            break
-                    
-                    if cancelled_count >= 3:
-                        unblocked_count += 1
-                        # Reset the status of their recent cancelled requests
-                        for req in recent_requests:
-                            if req.status == 'cancelled':
-                                req.status = 'expired'  # or any other status you prefer
-                                req.updated_at = datetime.utcnow()
+                if not exported_count:
+                    db.session.rollback()
+                    flash(f'No {status} requests found to export.', 'info')
+                    return redirect(url_for('faculty_dashboard'))
                 
                 db.session.commit()
-                app.logger.info(f'{len(requests)} requests marked as printed and {unblocked_count} students unblocked by {current_user.username} during export')
-                flash(f'{len(requests)} requests have been marked as printed and {unblocked_count} student blocks have been removed.', 'success')
+                app.logger.info(f'{exported_count} requests marked as printed and {unblocked_count} students unblocked by {current_user.username} during export')
+                flash(f'{exported_count} requests have been marked as printed and {unblocked_count} student blocks have been removed.', 'success')
                 
             except Exception as e:
                 db.session.rollback()
                 app.logger.error(f'Failed to update request statuses during export: {str(e)}')
                 flash('Failed to update request statuses. Please try again.', 'error')
                 return redirect(url_for('faculty_dashboard'))
+        elif db.session.query(PrintRequest.id).filter_by(status=status).first() is None and \
+                db.session.query(ArchivedPrintRequest.id).filter_by(status=status).first() is None:
+            flash(f'No {status} requests found to export.', 'info')
+            return redirect(url_for('faculty_dashboard'))
+        
+        # Export exactly the requests a pending export has just marked as printed
+        return requests_export(status, export_format, exported_at).response()
 
-        # Group requests by branch and semester
-        grouped_requests = {}
-        for req in requests:
-            key = (req.user.branch, req.user.semester)
-            if key not in grouped_requests:
-                grouped_requests[key] = []
-            grouped_requests[key].append({
-                'Date': req.created_at.strftime('%d-%m-%Y'),
-                'Student Name': req.user.name,
-                'Semester': req.user.semester,
-                'Branch': req.user.branch,
-                'Username': req.user.username,
-                'Print Path (TEST)': _build_test_print_path(req.user)
-            })
+    def _export_job_json(job):
+        data = {
+            'id': job.id,
+            'kind': job.kind,
+            'status': job.status,
+            'progress': job.progress,
+            'filename': job.filename,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'status_url': url_for('export_job_status', job_id=job.id)
+        }
+        if job.status == 'done':
+            data['download_url'] = url_for('download_export', job_id=job.id)
+        return data
 
-        # Create Excel file with multiple sheets
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            workbook = writer.book
-            
-            # Create header format
-            header_format = workbook.add_format({
-                'bold': True,
-                'font_size': 14,
-                'align': 'center',
-                'valign': 'vcenter',
-                'bg_color': '#f0f0f0',
-                'border': 1
-            })
-            
-            # Create column header format
-            column_format = workbook.add_format({
-                'bold': True,
-                'font_size': 11,
-                'align': 'center',
-                'valign': 'vcenter',
-                'bg_color': '#e6e6e6',
-                'border': 1
-            })
+    @app.route('/exports', methods=['POST'])
+    @login_required
+    def create_export():
+        if not app.config.get('EXPORT_JOBS_ENABLED'):
+            return jsonify({'status': 'error', 'message': 'Background exports are not enabled on this server.'}), 503
+        
+        data = request.get_json(silent=True) or request.form
+        kind = data.get('kind')
+        export_format = data.get('format', 'xlsx')
+        message = None
+        
+        if kind == 'requests':
+            if not current_user.is_faculty():
+                return jsonify({'status': 'error', 'message': 'Access denied.'}), 403
+            status = data.get('status', 'pending')
+            if status not in ['pending', 'printed', 'cancelled']:
+                return jsonify({'status': 'error', 'message': 'Invalid status specified.'}), 400
+            params = {'status': status, 'export_format': export_format}
+        elif kind == 'students':
+            if not current_user.is_auth():
+                return jsonify({'status': 'error', 'message': 'Access denied.'}), 403
+            params = {
+                'branch': data.get('branch', ''),
+                'semester': data.get('semester', ''),
+                'status': data.get('status', 'all'),
+                'search': (data.get('search') or '').strip(),
+                'export_format': export_format
+            }
+        elif kind == 'users':
+            if not current_user.is_admin():
+                return jsonify({'status': 'error', 'message': 'Access denied.'}), 403
+            params = {}
+        else:
+            return jsonify({'status': 'error', 'message': 'Invalid export type.'}), 400
+        
+        try:
+            # Marking a pending export as printed is quick and happens now, in the
+            # same transaction as the job; only building the file is deferred
+            if kind == 'requests' and params['status'] == 'pending':
+                exported_at, exported_count, unblocked_count = _mark_pending_exported()
+                if not exported_count:
+                    db.session.rollback()
+                    return jsonify({'status': 'error', 'message': 'No pending requests found to export.'}), 404
+                params['exported_at'] = exported_at.isoformat()
+                message = f'{exported_count} requests have been marked as printed and {unblocked_count} student blocks have been removed.'
             
-            # Create data cell format
-            cell_format = workbook.add_format({
-                'align': 'center',
-                'valign': 'vcenter',
-                'border': 1
-            })
+            job = enqueue_export(kind, params, current_user.id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f'Failed to queue {kind} export: {str(e)}')
+            return jsonify({'status': 'error', 'message': 'Failed to start export. Please try again.'}), 500
+        
+        app.logger.info(f'Export job {job.id} ({kind}) queued by {current_user.username}')
+        return jsonify(dict(_export_job_json(job), message=message)), 202
 
-            # Create each sheet
-            for (branch, semester), requests in grouped_requests.items():
-                sheet_name = f"{semester} {branch}"
-                df = pd.DataFrame(requests)
-                
-                # Write to sheet
-                df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=2)
-                worksheet = writer.sheets[sheet_name]
-                
-                # Write sheet header
-                worksheet.merge_range('A1:E1', f"{branch} - {semester}", header_format)
-                
-                # Format column headers and data
-                for col_num, value in enumerate(df.columns.values):
-                    worksheet.write(2, col_num, value, column_format)
-                    worksheet.set_column(col_num, col_num, 15, cell_format)
-                
-                # Auto-fit columns
-                for col_num, value in enumerate(df.columns.values):
-                    max_length = max(
-                        df[value].astype(str).apply(len).max(),
-                        len(value)
-                    ) + 2
-                    worksheet.set_column(col_num, col_num, max_length)
-
-        # Generate filename
-        filename = f'print_requests_{status}_{datetime.now().strftime("%Y%m%d")}.xlsx'
-        
-        return send_file(
-            io.BytesIO(output.getvalue()),
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
-        )
+    @app.route('/exports/<int:job_id>')
+    @login_required
+    def export_job_status(job_id):
+        job = ExportJob.query.filter_by(id=job_id, requested_by=current_user.id).first_or_404()
+        return jsonify(_export_job_json(job))
+
+    @app.route('/exports/<int:job_id>/download')
+    @login_required
+    def download_export(job_id):
+        job = ExportJob.query\
+            .filter_by(id=job_id, requested_by=current_user.id, status='done')\
+            .first_or_404()
+        headers = {'Content-Disposition': f'attachment; filename={job.filename}'}
+        if job.size is not None:
+            headers['Content-Length'] = str(job.size)
+        return Response(stream_with_context(stream_file(job.id)), mimetype=job.mimetype, headers=headers)
+
+    def _printed_history_queries(search_username=''):
+        # Printed requests, live and archived, optionally filtered by username,
+        # with their students loaded from the same join
+        queries = []
+        for model in (PrintRequest, ArchivedPrintRequest):
+            query = model.query\
+                .join(User, User.id == model.user_id)\
+                .options(db.contains_eager(model.user))\
+                .filter(model.status == 'printed')
+            if search_username:
+                query = query.filter(user_search_filter(search_username, include_name=False))
+            queries.append(query)
+        return queries
 
     @app.route('/faculty/print-history')
     @login_required
@@ -520,28 +787,71 @@ def create_app(config_name='default'):
             flash('Access denied.', 'error')
             return redirect(url_for('index'))
             
-        page = request.args.get('page', 1, type=int)
         per_page = 10
         search_username = request.args.get('username', '').strip()
         
-        # Base query
-        query = PrintRequest.query\
-            .join(User)\
-            .filter(PrintRequest.status == 'printed')
-        
-        # Add search filter if username provided
-        if search_username:
-            query = query.filter(User.username.ilike(f'%{search_username}%'))
+        query, archive_query = _printed_history_queries(search_username)
         
         # Get printed requests history with search filter
-        printed_requests = query\
-            .order_by(PrintRequest.created_at.desc())\
-            .paginate(page=page, per_page=per_page)
+        printed_requests = paginate_requests(query, per_page, archive_query)
         
         return render_template('print_history.html', 
                              printed_requests=printed_requests,
                              search_username=search_username)
 
+    def _request_list_response(scope, version, query, include_student=False, archive_query=None):
+        # Answer unchanged polls from the scope's version marker alone, before the page query runs
+        etag = request_list_etag(scope, version)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            if include_student:
+                query = query.options(db.contains_eager(PrintRequest.user))
+            per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
+            page = paginate_requests(query, per_page, archive_query)
+            response = jsonify(serialize_page(page, include_student))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    @app.route('/api/queue/pending')
+    @login_required
+    def api_pending_queue():
+        if not current_user.is_faculty():
+            return jsonify({'status': 'error', 'message': 'Access denied.'}), 403
+        
+        query = PrintRequest.query\
+            .join(User)\
+            .filter(PrintRequest.status == 'pending')
+        
+        search_username = request.args.get('username', '').strip()
+        if search_username:
+            query = query.filter(user_search_filter(search_username, include_name=False))
+        
+        return _request_list_response('pending', pending_queue_version(), query, include_student=True)
+
+    @app.route('/api/queue/history')
+    @login_required
+    def api_print_history():
+        if not current_user.is_faculty():
+            return jsonify({'status': 'error', 'message': 'Access denied.'}), 403
+        
+        query, archive_query = _printed_history_queries(request.args.get('username', '').strip())
+        return _request_list_response('printed', print_history_version(), query,
+                                      include_student=True, archive_query=archive_query)
+
+    @app.route('/api/my-requests')
+    @login_required
+    def api_my_requests():
+        if not current_user.is_student():
+            return jsonify({'status': 'error', 'message': 'Access denied.'}), 403
+        
+        query = PrintRequest.query.filter_by(user_id=current_user.id)
+        archive_query = ArchivedPrintRequest.query.filter_by(user_id=current_user.id)
+        return _request_list_response(f'student:{current_user.id}',
+                                      student_requests_version(current_user.id), query,
+                                      archive_query=archive_query)
+
     @app.route('/student/settings', methods=['GET', 'POST'])
     @login_required
     def student_settings():
@@ -600,8 +910,10 @@ def create_app(config_name='default'):
         
         print_request.status = 'cancelled'
         print_request.updated_at = datetime.utcnow()
+        print_request.user.record_cancellation()
         
         try:
+            publish_request_event('cancelled', [print_request])
             db.session.commit()
             app.logger.info(f'Request #{request_id} marked as cancelled by {current_user.username}')
             flash('Request marked as cancelled.', 'success')
@@ -639,7 +951,10 @@ def create_app(config_name='default'):
             status.updated_by = current_user.id
             status.reason = reason
             
+            # Tell the other workers to drop their cached status once this commits
+            publish_invalidation('system_status')
             db.session.commit()
+            update_system_status_cache(status)
             
             message = 'Print service activated.' if status.is_active else 'Print service terminated.'
             app.logger.info(f'Print service {"activated" if status.is_active else "terminated"} by {current_user.username}')
@@ -701,12 +1016,7 @@ def create_app(config_name='default'):
         
         # Apply search if provided
         if search:
-            query = query.filter(
-                db.or_(
-                    User.username.ilike(f'%{search}%'),
-                    User.name.ilike(f'%{search}%')
-                )
-            )
+            query = query.filter(user_search_filter(search))
         
         # Get paginated results
         students = query.order_by(User.created_at.desc()).paginate(
@@ -745,76 +1055,14 @@ def create_app(config_name='default'):
         if not current_user.is_auth():
             return jsonify({'error': 'Access denied. Only authentication administrators can access this feature.'}), 403
         
-        # Get filter parameters
-        branch = request.args.get('branch', '')
-        semester = request.args.get('semester', '')
-        status = request.args.get('status', 'all')
-        search = request.args.get('search', '').strip()
-        export_format = request.args.get('format', 'xlsx')
-        
-        # Base query
-        query = User.query.filter_by(role='student')
-        
-        # Apply filters
-        if branch:
-            query = query.filter_by(branch=branch)
-        if semester:
-            query = query.filter_by(semester=semester)
-        if status == 'verified':
-            query = query.filter_by(is_verified=True)
-        elif status == 'unverified':
-            query = query.filter_by(is_verified=False)
-        
-        # Apply search
-        if search:
-            query = query.filter(
-                db.or_(
-                    User.username.ilike(f'%{search}%'),
-                    User.name.ilike(f'%{search}%')
-                )
-            )
-        
-        # Get all matching students
-        students = query.all()
-        
-        # Create DataFrame
-        data = []
-        for student in students:
-            data.append({
-                'Username': student.username,
-                'Name': student.name,
-                'Branch': student.branch,
-                'Semester': student.semester,
-                'Registered On': student.created_at.strftime('%d-%m-%Y %H:%M'),
-                'Status': 'Verified' if student.is_verified else 'Pending',
-                'Verified On': student.verified_at.strftime('%d-%m-%Y %H:%M') if student.verified_at else '-',
-                'Verified By': User.query.get(student.verified_by).username if student.verified_by else '-'
-            })
-        
-        df = pd.DataFrame(data)
-        
-        # Create output buffer
-        output = io.BytesIO()
-        
-        # Export based on format
-        if export_format == 'xlsx':
-            df.to_excel(output, index=False, engine='xlsxwriter')
-            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            extension = 'xlsx'
-        else:
-            df.to_csv(output, index=False)
-            mimetype = 'text/csv'
-            extension = 'csv'
-        
-        # Generate filename
-        filename = f'students_export_{datetime.now().strftime("%Y%m%d_%H%M")}.{extension}'
-        
-        return send_file(
-            io.BytesIO(output.getvalue()),
-            mimetype=mimetype,
-            as_attachment=True,
-            download_name=filename
+        export = students_export(
+            branch=request.args.get('branch', ''),
+            semester=request.args.get('semester', ''),
+            status=request.args.get('status', 'all'),
+            search=request.args.get('search', '').strip(),
+            export_format=request.args.get('format', 'xlsx')
         )
+        return export.response()
 
     @app.route('/auth/verify-student/<int:student_id>', methods=['POST'])
     @login_required
@@ -903,12 +1151,7 @@ def create_app(config_name='default'):
         
         # Apply search
         if search:
-            query = query.filter(
-                db.or_(
-                    User.username.ilike(f'%{search}%'),
-                    User.name.ilike(f'%{search}%')
-                )
-            )
+            query = query.filter(user_search_filter(search))
         
         # Get paginated results
         users = query.order_by(User.created_at.desc()).paginate(
@@ -917,21 +1160,10 @@ def create_app(config_name='default'):
         )
         
         # Get system status
-        system_status = SystemStatus.query.first()
-        if not system_status:
-            system_status = SystemStatus(is_active=True)
-            db.session.add(system_status)
-            db.session.commit()
+        system_status = get_system_status()
         
         # Get statistics
-        stats = {
-            'total_users': User.query.count(),
-            'total_students': User.query.filter_by(role='student').count(),
-            'total_faculty': User.query.filter_by(role='faculty').count(),
-            'active_users': User.query.filter_by(is_active=True).count(),
-            'total_requests': PrintRequest.query.count(),
-            'pending_requests': PrintRequest.query.filter_by(status='pending').count()
-        }
+        stats = get_dashboard_stats()
         
         return render_template(
             'admin/dashboard.html',
@@ -961,6 +1193,7 @@ def create_app(config_name='default'):
         
         try:
             user.is_active = not user.is_active
+            invalidate_dashboard_stats()
             db.session.commit()
             
             status = 'activated' if user.is_active else 'deactivated'
@@ -989,11 +1222,13 @@ def create_app(config_name='default'):
             return jsonify({'status': 'error', 'message': 'Cannot delete admin accounts'}), 400
         
         try:
-            # Delete associated print requests first
+            # Delete associated print requests (live and archived) first
             PrintRequest.query.filter_by(user_id=user_id).delete()
+            ArchivedPrintRequest.query.filter_by(user_id=user_id).delete()
             
             # Delete the user
             db.session.delete(user)
+            invalidate_dashboard_stats()
             db.session.commit()
             
             app.logger.info(f'User {user.username} deleted by admin: {current_user.username}')
@@ -1033,7 +1268,10 @@ def create_app(config_name='default'):
             status.updated_by = current_user.id
             status.reason = reason
             
+            # Tell the other workers to drop their cached status once this commits
+            publish_invalidation('system_status')
             db.session.commit()
+            update_system_status_cache(status)
             
             message = 'Print service activated.' if status.is_active else 'Print service terminated.'
             app.logger.info(f'Print service {"activated" if status.is_active else "terminated"} by admin: {current_user.username}')
@@ -1053,39 +1291,8 @@ def create_app(config_name='default'):
             return jsonify({'error': 'Access denied'}), 403
         
         try:
-            users = User.query.all()
-            data = []
-            
-            for user in users:
-                if user.is_admin():  # Skip admin accounts in export
-                    continue
-                    
-                data.append({
-                    'Username': user.username,
-                    'Role': user.role.title(),
-                    'Name': user.name,
-                    'Branch': user.branch,
-                    'Semester': user.semester,
-                    'Status': 'Active' if user.is_active else 'Inactive',
-                    'Created On': user.created_at.strftime('%d-%m-%Y %H:%M'),
-                    'Last Login': user.last_login.strftime('%d-%m-%Y %H:%M') if user.last_login else 'Never',
-                    'Total Requests': PrintRequest.query.filter_by(user_id=user.id).count(),
-                    'Pending Requests': PrintRequest.query.filter_by(user_id=user.id, status='pending').count()
-                })
-            
-            df = pd.DataFrame(data)
-            output = io.BytesIO()
-            
-            # Export as Excel
-            df.to_excel(output, index=False, engine='xlsxwriter')
-            output.seek(0)
-            
-            return send_file(
-                output,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name=f'users_export_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx'
-            )
+            # Export as Excel, streaming rows straight into the sheet
+            return users_export().response()
             
         except Exception as e:
             app.logger.error(f'Failed to export users: {str(e)}')
@@ -1113,31 +1320,63 @@ def create_app(config_name='default'):
         app.logger.error(f'Unauthorized access: {request.url}')
         return render_template('errors/401.html'), 401
 
-    # Create tables and default users
-    with app.app_context():
-        db.create_all()
-        
-        # Create default admin account if it doesn't exist
-        admin = User.query.filter_by(username='admin').first()
-        if not admin:
-            admin = User(username='admin', role='admin', name='Administrator')
-            admin.set_password('admin123')
-            db.session.add(admin)
-        
-        # Create default faculty account if it doesn't exist
-        faculty = User.query.filter_by(username='faculty1').first()
-        if not faculty:
-            faculty = User(username='faculty1', role='faculty', name='Faculty Member')
-            faculty.set_password('adminpass')
-            db.session.add(faculty)
-            
-        # Create initial system status if it doesn't exist
-        status = SystemStatus.query.first()
-        if not status:
-            status = SystemStatus(is_active=True)
-            db.session.add(status)
-            
-        db.session.commit()
+    @app.errorhandler(PasswordHashingBusy)
+    def hashing_busy_error(error):
+        db.session.rollback()
+        app.logger.warning(f'Password hashing overloaded: {error} ({request.url})')
+        return render_template('errors/503.html'), 503, {'Retry-After': '5'}
+
+    # CLI commands
+    @app.cli.command('bootstrap')
+    def bootstrap_command():
+        """Create tables, default accounts and the initial system status."""
+        if bootstrap_database():
+            print('Database bootstrapped.')
+        else:
+            print('Database already bootstrapped.')
+    
+    @app.cli.command('export-worker')
+    @click.option('--once', is_flag=True, help='Exit once the queue is empty.')
+    def export_worker_command(once):
+        """Process queued export jobs."""
+        run_worker(app, once=once)
+    
+    @app.cli.command('retry-export')
+    @click.argument('job_id', type=int)
+    def retry_export_command(job_id):
+        """Re-queue a failed or stuck export job, e.g. one whose requests were already marked printed."""
+        if retry_job(job_id):
+            print(f'Export job {job_id} re-queued.')
+        else:
+            print(f'Export job {job_id} is not failed or running.')
+    
+    @app.cli.command('archive-requests')
+    @click.option('--days', type=click.IntRange(min=1), default=None,
+                  help='Archive finished requests not updated for this many days.')
+    def archive_requests_command(days):
+        """Move old printed/cancelled/expired requests to the archive table."""
+        days = days or app.config['REQUEST_ARCHIVE_AFTER_DAYS']
+        if not days:
+            print('Archiving is off: pass --days N or set REQUEST_ARCHIVE_AFTER_DAYS.')
+            return
+        moved = archive_old_requests(days, app.config['REQUEST_ARCHIVE_BATCH_SIZE'])
+        print(f'Archived {moved} requests older than {days} days.')
+    
+    @app.cli.command('compile-templates')
+    def compile_templates_command():
+        """Compile every template into the Jinja bytecode cache."""
+        templates = app.jinja_env.list_templates()
+        for name in templates:
+            app.jinja_env.get_template(name)
+        print(f'Compiled {len(templates)} templates into {app.config.get("JINJA_CACHE_DIR")}')
+    
+    # Create tables and default users, unless booting fast (serverless) where
+    # `flask bootstrap` is run explicitly instead
+    if bootstrap is None:
+        bootstrap = not app.config['FAST_BOOT']
+    if bootstrap:
+        with app.app_context():
+            bootstrap_database()
         
     return app
 
@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import request
+
+from models import db, PrintRequest
+from query_budget import current_queries
+
+# Custom metrics, created on the first init_metrics call; None while metrics are off
+_metrics = None
+_metrics_lock = threading.Lock()
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+POOL_WAIT_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+EXPORT_SECONDS_BUCKETS = (.1, .5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+EXPORT_ROWS_BUCKETS = (10, 100, 1000, 5000, 10000, 50000, 100000, 500000)
+
+
+def _create_metrics():
+    from prometheus_client import Gauge, Histogram
+
+    return {
+        'db_queries': Histogram(
+            'printpal_db_queries_per_request', 'SQL statements executed per HTTP request',
+            ['endpoint'], buckets=QUERY_COUNT_BUCKETS),
+        'db_seconds': Histogram(
+            'printpal_db_query_seconds_per_request', 'Time spent in SQL statements per HTTP request',
+            ['endpoint'], buckets=LATENCY_BUCKETS),
+        'pool_wait': Histogram(
+            'printpal_db_pool_checkout_seconds',
+            'Time spent waiting for a database connection (including opening a new one)',
+            buckets=POOL_WAIT_BUCKETS),
+        'pool_checked_out': Gauge(
+            'printpal_db_pool_checked_out', 'Database connections currently checked out of the pool',
+            multiprocess_mode='livesum'),
+        'export_seconds': Histogram(
+            'printpal_export_duration_seconds', 'Time to build an export, including its queries',
+            ['kind', 'format'], buckets=EXPORT_SECONDS_BUCKETS),
+        'export_rows': Histogram(
+            'printpal_export_rows', 'Rows written per export',
+            ['kind', 'format'], buckets=EXPORT_ROWS_BUCKETS),
+        # Refreshed on every scrape; across gunicorn workers the latest refresh wins
+        'pending_requests': Gauge(
+            'printpal_pending_requests', 'Print requests waiting in the queue',
+            multiprocess_mode='mostrecent'),
+    }
+
+
+def init_metrics(app):
+    """
+    Expose Prometheus metrics on METRICS_PATH, if enabled and prometheus-flask-exporter is installed.
+
+    Under gunicorn, set PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py does) so every
+    worker writes its samples there and a scrape of any one worker reports the
+    whole server; without it the metrics are those of the current process.
+    """
+    global _metrics
+
+    if not app.config.get('METRICS_ENABLED'):
+        return None
+
+    try:
+        from prometheus_flask_exporter import PrometheusMetrics
+        from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+    except ImportError:
+        app.logger.warning('prometheus-flask-exporter is not installed; metrics are disabled')
+        return None
+
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = _create_metrics()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        exporter_class = GunicornInternalPrometheusMetrics
+    else:
+        exporter_class = PrometheusMetrics
+
+    # Per-endpoint request counts and latency histograms; long-lived SSE streams
+    # and static files would only skew the latencies
+    metrics_path = app.config.get('METRICS_PATH', '/metrics')
+    untracked = ('/static/', '/events/', metrics_path)
+    exporter = exporter_class(
+        app,
+        path=metrics_path,
+        group_by='endpoint',
+        buckets=LATENCY_BUCKETS,
+        excluded_paths=['^/static/', '^/events/'],
+        metrics_decorator=_metrics_view(app)
+    )
+
+    with app.app_context():
+        _instrument_engine(db.engine)
+
+    @app.teardown_request
+    def _observe_request_queries(error=None):
+        if request.path.startswith(untracked):
+            return
+        recorder = current_queries()
+        endpoint = request.endpoint or 'none'
+        _metrics['db_queries'].labels(endpoint).observe(recorder.count if recorder else 0)
+        _metrics['db_seconds'].labels(endpoint).observe(recorder.seconds if recorder else 0)
+
+    return exporter
+
+
+def _metrics_view(app):
+    def decorator(view):
+        @wraps(view)
+        def metrics_view(*args, **kwargs):
+            token = app.config.get('METRICS_AUTH_TOKEN')
+            if token and request.headers.get('Authorization') != f'Bearer {token}':
+                return 'Unauthorized', 401
+            _refresh_queue_depth(app)
+            return view(*args, **kwargs)
+        return metrics_view
+    return decorator
+
+
+def _refresh_queue_depth(app):
+    # One count over the partial pending index per scrape
+    try:
+        pending = db.session.query(db.func.count(PrintRequest.id))\
+            .filter(PrintRequest.status == 'pending')\
+            .scalar()
+        _metrics['pending_requests'].set(pending)
+    except Exception as e:
+        app.logger.warning(f'Could not read the pending queue depth: {str(e)}')
+        db.session.rollback()
+
+
+def _instrument_engine(engine):
+    """Track pool checkouts for ``engine``; statements are counted by query_budget."""
+
+    @db.event.listens_for(engine, 'checkout')
+    def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+        _metrics['pool_checked_out'].inc()
+
+    @db.event.listens_for(engine, 'checkin')
+    def _count_checkin(dbapi_connection, connection_record):
+        _metrics['pool_checked_out'].dec()
+
+    # The pool has no "checkout requested" event, so time the call that waits on it
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            _metrics['pool_wait'].observe(time.perf_counter() - started)
+
+    engine.raw_connection = timed_raw_connection
+
+
+def observe_export(kind, export_format, seconds, rows):
+    """Record one finished export (no-op while metrics are disabled)."""
+    if _metrics is None:
+        return
+    _metrics['export_seconds'].labels(kind, export_format).observe(seconds)
+    _metrics['export_rows'].labels(kind, export_format).observe(rows)
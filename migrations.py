@@ -2,7 +2,8 @@ from flask_migrate import Migrate
 from main import create_app
 from models import db
 
-app = create_app()
+# Don't touch the schema before the migrations run
+app = create_app(bootstrap=False)
 migrate = Migrate(app, db)
 
 if __name__ == '__main__':
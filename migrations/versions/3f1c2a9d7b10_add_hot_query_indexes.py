@@ -0,0 +1,71 @@
+"""add hot query indexes
+
+Indexes backing the dashboard, print history and export queries:
+print_requests by (user_id, created_at) and (status, created_at), a partial
+index over the pending queue, and role/branch/semester lookups on users.
+
+Tables created by ``db.create_all()`` before this revision have no indexes
+beyond the primary keys, so existing indexes are skipped rather than recreated.
+On PostgreSQL the indexes are built CONCURRENTLY to avoid locking the tables.
+
+Revision ID: 3f1c2a9d7b10
+Revises: 
+Create Date: 2026-10-18 19:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+PENDING_ONLY = sa.text("status = 'pending'")
+
+INDEXES = [
+    ('ix_print_requests_user_created', 'print_requests',
+     ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], {}),
+    ('ix_print_requests_status_created', 'print_requests',
+     ['status', sa.text('created_at DESC'), sa.text('id DESC')], {}),
+    ('ix_print_requests_pending', 'print_requests',
+     [sa.text('created_at DESC'), sa.text('id DESC')],
+     {'postgresql_where': PENDING_ONLY, 'sqlite_where': PENDING_ONLY}),
+    ('ix_users_role', 'users', ['role'], {}),
+    ('ix_users_branch_semester', 'users', ['branch', 'semester'], {}),
+    ('ix_users_semester', 'users', ['semester'], {}),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    for name, table, columns, kwargs in INDEXES:
+        if name in _existing_indexes(table):
+            continue
+        if is_postgres:
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+        else:
+            op.create_index(name, table, columns, **kwargs)
+
+
+def downgrade():
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    for name, table, _columns, _kwargs in reversed(INDEXES):
+        if name not in _existing_indexes(table):
+            continue
+        if is_postgres:
+            with op.get_context().autocommit_block():
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        else:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,86 @@
+"""add user block state
+
+Materialize each student's run of trailing cancelled requests on the users
+row (consecutive_cancellations / is_blocked) so the block check is a column
+read instead of a scan of their latest requests.
+
+Columns and indexes created by ``db.create_all()`` are left as they are; the
+backfill only runs when the columns are added here.
+
+Revision ID: 8b4e6d2c1a57
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-18 19:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d2c1a57'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+MAX_CONSECUTIVE_CANCELLATIONS = 3
+
+# Cancelled requests newer than the user's latest printed/expired request.
+# Pending requests never break a run: only one can exist and it is the newest.
+BACKFILL = sa.text("""
+    UPDATE users SET consecutive_cancellations = (
+        SELECT COUNT(*) FROM print_requests p
+        WHERE p.user_id = users.id
+          AND p.status = 'cancelled'
+          AND NOT EXISTS (
+              SELECT 1 FROM print_requests q
+              WHERE q.user_id = p.user_id
+                AND q.status NOT IN ('cancelled', 'pending')
+                AND (q.created_at > p.created_at
+                     OR (q.created_at = p.created_at AND q.id > p.id))
+          )
+    )
+""")
+
+
+def _columns(inspector, table):
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if 'consecutive_cancellations' not in _columns(inspector, 'users'):
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.add_column(sa.Column('consecutive_cancellations', sa.Integer(),
+                                          nullable=False, server_default='0'))
+            batch_op.add_column(sa.Column('is_blocked', sa.Boolean(),
+                                          nullable=False, server_default=sa.false()))
+
+        op.execute(BACKFILL)
+        op.execute(
+            sa.text('UPDATE users SET is_blocked = (consecutive_cancellations >= :threshold)')
+            .bindparams(threshold=MAX_CONSECUTIVE_CANCELLATIONS)
+        )
+
+    if 'ix_users_blocked' not in _existing_indexes(inspector, 'users'):
+        op.create_index('ix_users_blocked', 'users', ['id'],
+                        postgresql_where=sa.text('is_blocked'),
+                        sqlite_where=sa.text('is_blocked'))
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if 'ix_users_blocked' in _existing_indexes(inspector, 'users'):
+        op.drop_index('ix_users_blocked', table_name='users')
+    columns = _columns(inspector, 'users')
+    with op.batch_alter_table('users') as batch_op:
+        if 'is_blocked' in columns:
+            batch_op.drop_column('is_blocked')
+        if 'consecutive_cancellations' in columns:
+            batch_op.drop_column('consecutive_cancellations')
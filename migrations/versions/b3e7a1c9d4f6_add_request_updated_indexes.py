@@ -0,0 +1,60 @@
+"""add request updated indexes
+
+Indexes answering the version markers of the JSON request lists (see
+queue_api.py): the latest updated_at per status and per student, each a
+single index probe.
+
+Existing indexes (e.g. from ``db.create_all()``) are skipped. On PostgreSQL
+the indexes are built CONCURRENTLY to avoid locking print_requests.
+
+Revision ID: b3e7a1c9d4f6
+Revises: f2c8a5e7d3b9
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e7a1c9d4f6'
+down_revision = 'f2c8a5e7d3b9'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_print_requests_status_updated', 'print_requests', ['status', 'updated_at']),
+    ('ix_print_requests_user_updated', 'print_requests', ['user_id', 'updated_at']),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    for name, table, columns in INDEXES:
+        if name in _existing_indexes(table):
+            continue
+        if is_postgres:
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+        else:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    for name, table, _columns in reversed(INDEXES):
+        if name not in _existing_indexes(table):
+            continue
+        if is_postgres:
+            with op.get_context().autocommit_block():
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        else:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,92 @@
+"""add user search indexes
+
+Substring search on users.username / users.name: pg_trgm GIN indexes on
+PostgreSQL, plus normalized (lowercased) search columns with btree indexes
+that other backends use for prefix search.
+
+Columns and indexes created by ``db.create_all()`` are left as they are; the
+search columns are only backfilled when they are added here.
+
+Revision ID: c5d9e0f4b2a3
+Revises: 8b4e6d2c1a57
+Create Date: 2026-10-18 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d9e0f4b2a3'
+down_revision = '8b4e6d2c1a57'
+branch_labels = None
+depends_on = None
+
+
+TRIGRAM_INDEXES = [
+    ('ix_users_username_trgm', 'username'),
+    ('ix_users_name_trgm', 'name'),
+]
+
+
+SEARCH_INDEXES = [
+    ('ix_users_username_search', 'username_search'),
+    ('ix_users_name_search', 'name_search'),
+]
+
+
+def _columns(inspector, table):
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    columns = _columns(inspector, 'users')
+    if 'username_search' not in columns or 'name_search' not in columns:
+        with op.batch_alter_table('users') as batch_op:
+            if 'username_search' not in columns:
+                batch_op.add_column(sa.Column('username_search', sa.String(length=80), nullable=True))
+            if 'name_search' not in columns:
+                batch_op.add_column(sa.Column('name_search', sa.String(length=100), nullable=True))
+        op.execute('UPDATE users SET username_search = lower(trim(username)), name_search = lower(trim(name))')
+
+    existing = _existing_indexes(inspector, 'users')
+    for name, column in SEARCH_INDEXES:
+        if name not in existing:
+            op.create_index(name, 'users', [column])
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        with op.get_context().autocommit_block():
+            for name, column in TRIGRAM_INDEXES:
+                if name in existing:
+                    continue
+                op.create_index(name, 'users', [column], postgresql_using='gin',
+                                postgresql_ops={column: 'gin_trgm_ops'},
+                                postgresql_concurrently=True)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    existing = _existing_indexes(inspector, 'users')
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, _column in TRIGRAM_INDEXES:
+                if name in existing:
+                    op.drop_index(name, table_name='users', postgresql_concurrently=True)
+
+    for name, _column in reversed(SEARCH_INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name='users')
+    columns = _columns(inspector, 'users')
+    with op.batch_alter_table('users') as batch_op:
+        if 'name_search' in columns:
+            batch_op.drop_column('name_search')
+        if 'username_search' in columns:
+            batch_op.drop_column('username_search')
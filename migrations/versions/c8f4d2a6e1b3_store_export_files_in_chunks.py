@@ -0,0 +1,64 @@
+"""store export files in chunks
+
+Finished export files move from a single export_jobs.artifact blob to
+export_job_chunks rows, so the worker stores them and the download streams
+them without holding a whole workbook in memory. The file size is kept on
+the job for Content-Length.
+
+Tables and columns created by ``db.create_all()`` are left as they are.
+
+Revision ID: c8f4d2a6e1b3
+Revises: b3e7a1c9d4f6
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f4d2a6e1b3'
+down_revision = 'b3e7a1c9d4f6'
+branch_labels = None
+depends_on = None
+
+
+def _columns(inspector, table):
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if 'export_job_chunks' not in inspector.get_table_names():
+        op.create_table(
+            'export_job_chunks',
+            sa.Column('job_id', sa.Integer(), nullable=False),
+            sa.Column('seq', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('data', sa.LargeBinary(), nullable=False),
+            sa.ForeignKeyConstraint(['job_id'], ['export_jobs.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('job_id', 'seq')
+        )
+
+    # Files of jobs finished before this revision are dropped with the column;
+    # they expire within EXPORT_RETENTION_HOURS anyway
+    columns = _columns(inspector, 'export_jobs')
+    with op.batch_alter_table('export_jobs') as batch_op:
+        if 'size' not in columns:
+            batch_op.add_column(sa.Column('size', sa.BigInteger(), nullable=True))
+        if 'artifact' in columns:
+            batch_op.drop_column('artifact')
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    columns = _columns(inspector, 'export_jobs')
+    with op.batch_alter_table('export_jobs') as batch_op:
+        if 'artifact' not in columns:
+            batch_op.add_column(sa.Column('artifact', sa.LargeBinary(), nullable=True))
+        if 'size' in columns:
+            batch_op.drop_column('size')
+
+    if 'export_job_chunks' in inspector.get_table_names():
+        op.drop_table('export_job_chunks')
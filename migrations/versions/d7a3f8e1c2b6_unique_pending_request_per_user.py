@@ -0,0 +1,72 @@
+"""unique pending request per user
+
+Partial unique index on print_requests (user_id) WHERE status = 'pending', so
+the database itself guarantees a student has at most one pending request and
+request_print can submit with a single conditional INSERT.
+
+Duplicate pending rows left behind by the old check-then-insert race are
+resolved first: the oldest pending request per user keeps its place in the
+queue and the later duplicates are marked 'expired'. An existing index (e.g. from ``db.create_all()``) is
+left as it is.
+
+Revision ID: d7a3f8e1c2b6
+Revises: c5d9e0f4b2a3
+Create Date: 2026-10-18 21:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3f8e1c2b6'
+down_revision = 'c5d9e0f4b2a3'
+branch_labels = None
+depends_on = None
+
+
+PENDING_ONLY = sa.text("status = 'pending'")
+
+EXPIRE_DUPLICATES = sa.text("""
+    UPDATE print_requests SET status = 'expired', updated_at = CURRENT_TIMESTAMP
+    WHERE status = 'pending'
+      AND EXISTS (
+          SELECT 1 FROM print_requests older
+          WHERE older.user_id = print_requests.user_id
+            AND older.status = 'pending'
+            AND (older.created_at < print_requests.created_at
+                 OR (older.created_at = print_requests.created_at AND older.id < print_requests.id))
+      )
+""")
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    if 'uq_print_requests_user_pending' in _existing_indexes('print_requests'):
+        return
+
+    op.execute(EXPIRE_DUPLICATES)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('uq_print_requests_user_pending', 'print_requests', ['user_id'],
+                            unique=True, postgresql_where=PENDING_ONLY, postgresql_concurrently=True)
+    else:
+        op.create_index('uq_print_requests_user_pending', 'print_requests', ['user_id'],
+                        unique=True, sqlite_where=PENDING_ONLY)
+
+
+def downgrade():
+    if 'uq_print_requests_user_pending' not in _existing_indexes('print_requests'):
+        return
+
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('uq_print_requests_user_pending', table_name='print_requests',
+                          postgresql_concurrently=True)
+    else:
+        op.drop_index('uq_print_requests_user_pending', table_name='print_requests')
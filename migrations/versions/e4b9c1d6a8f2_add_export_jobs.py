@@ -0,0 +1,75 @@
+"""add export jobs
+
+Table backing the background export queue: workers claim queued rows with
+FOR UPDATE SKIP LOCKED and store the finished file on the row.
+
+``bootstrap_database()`` may already have created the table and its indexes
+with ``db.create_all()``, so existing ones are skipped.
+
+Revision ID: e4b9c1d6a8f2
+Revises: d7a3f8e1c2b6
+Create Date: 2026-10-18 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b9c1d6a8f2'
+down_revision = 'd7a3f8e1c2b6'
+branch_labels = None
+depends_on = None
+
+
+QUEUED_ONLY = sa.text("status = 'queued'")
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'export_jobs' in inspector.get_table_names():
+        indexes = _existing_indexes(inspector, 'export_jobs')
+    else:
+        indexes = set()
+        op.create_table(
+            'export_jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('kind', sa.String(length=20), nullable=False),
+            sa.Column('params', sa.Text(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('requested_by', sa.Integer(), nullable=True),
+            sa.Column('progress', sa.Integer(), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('filename', sa.String(length=200), nullable=True),
+            sa.Column('mimetype', sa.String(length=100), nullable=True),
+            sa.Column('artifact', sa.LargeBinary(), nullable=True),
+            sa.Column('error', sa.String(length=500), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'ix_export_jobs_queued' not in indexes:
+        op.create_index('ix_export_jobs_queued', 'export_jobs', ['id'],
+                        postgresql_where=QUEUED_ONLY, sqlite_where=QUEUED_ONLY)
+    if 'ix_export_jobs_requested_by' not in indexes:
+        op.create_index('ix_export_jobs_requested_by', 'export_jobs',
+                        ['requested_by', sa.text('created_at DESC')])
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'export_jobs' not in inspector.get_table_names():
+        return
+    indexes = _existing_indexes(inspector, 'export_jobs')
+    if 'ix_export_jobs_requested_by' in indexes:
+        op.drop_index('ix_export_jobs_requested_by', table_name='export_jobs')
+    if 'ix_export_jobs_queued' in indexes:
+        op.drop_index('ix_export_jobs_queued', table_name='export_jobs')
+    op.drop_table('export_jobs')
@@ -0,0 +1,70 @@
+"""add print requests archive
+
+Table receiving finished print requests once they are older than
+REQUEST_ARCHIVE_AFTER_DAYS (see archive.py), with the same user/status
+access paths as print_requests plus created_at for the archive horizon.
+
+``bootstrap_database()`` may already have created the table and its indexes
+with ``db.create_all()``, so existing ones are skipped.
+
+Revision ID: f2c8a5e7d3b9
+Revises: e4b9c1d6a8f2
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8a5e7d3b9'
+down_revision = 'e4b9c1d6a8f2'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_print_requests_archive_user_created',
+     ['user_id', sa.text('created_at DESC'), sa.text('id DESC')]),
+    ('ix_print_requests_archive_status_created',
+     ['status', sa.text('created_at DESC'), sa.text('id DESC')]),
+    ('ix_print_requests_archive_created',
+     [sa.text('created_at DESC'), sa.text('id DESC')]),
+]
+
+
+def _existing_indexes(inspector):
+    return {index['name'] for index in inspector.get_indexes('print_requests_archive')}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'print_requests_archive' in inspector.get_table_names():
+        existing = _existing_indexes(inspector)
+    else:
+        existing = set()
+        op.create_table(
+            'print_requests_archive',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('archived_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    for name, columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, 'print_requests_archive', columns)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'print_requests_archive' not in inspector.get_table_names():
+        return
+    existing = _existing_indexes(inspector)
+    for name, _columns in reversed(INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name='print_requests_archive')
+    op.drop_table('print_requests_archive')
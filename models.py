@@ -1,10 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.dialects import postgresql, sqlite
+from hashing import hash_password, verify_password, needs_rehash
 
 db = SQLAlchemy()
 
+# Students whose last N requests were all cancelled cannot submit new ones
+MAX_CONSECUTIVE_CANCELLATIONS = 3
+
+def normalize_search_text(value):
+    return (value or '').strip().lower()
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     
@@ -21,14 +28,27 @@ class User(UserMixin, db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime, nullable=True)
     
+    # Trailing cancelled requests, maintained by the cancel/print/export write paths
+    consecutive_cancellations = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    is_blocked = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    
+    # Lowercased copies of username/name for prefix search on non-Postgres backends
+    username_search = db.Column(db.String(80), nullable=True)
+    name_search = db.Column(db.String(100), nullable=True)
+    
     # Relationship with print requests
     print_requests = db.relationship('PrintRequest', backref='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        if not verify_password(self.password_hash, password):
+            return False
+        # Upgrade hashes made with old parameters; saved with the caller's commit
+        if needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
     
     def is_student(self):
         return self.role == 'student'
@@ -41,6 +61,35 @@ class User(UserMixin, db.Model):
     
     def can_use_print_service(self):
         return self.is_active and (not self.is_student() or self.is_verified)
+    
+    def record_cancellation(self):
+        # SQL-side increment so concurrent cancellations are not lost
+        self.consecutive_cancellations = User.consecutive_cancellations + 1
+        self.is_blocked = User.consecutive_cancellations + 1 >= MAX_CONSECUTIVE_CANCELLATIONS
+        
+    def reset_cancellations(self):
+        self.consecutive_cancellations = 0
+        self.is_blocked = False
+    
+    def recount_cancellations(self):
+        """
+        Recompute the run from this student's requests, for when a request other
+        than their newest changes status: cancelled requests newer than their
+        latest printed/expired one (pending requests never break a run).
+        """
+        cancelled = db.aliased(PrintRequest)
+        later = db.aliased(PrintRequest)
+        run = db.session.query(db.func.count(cancelled.id)).filter(
+            cancelled.user_id == self.id,
+            cancelled.status == 'cancelled',
+            ~db.exists().where(
+                later.user_id == self.id,
+                later.status.notin_(('cancelled', 'pending')),
+                db.tuple_(later.created_at, later.id) > db.tuple_(cancelled.created_at, cancelled.id)
+            )
+        ).scalar()
+        self.consecutive_cancellations = run
+        self.is_blocked = run >= MAX_CONSECUTIVE_CANCELLATIONS
 
 class PrintRequest(db.Model):
     __tablename__ = 'print_requests'
@@ -59,6 +108,103 @@ class PrintRequest(db.Model):
     def student_class(self):
         return self.user.student_class 
 
+class ArchivedPrintRequest(db.Model):
+    """A finished request moved out of print_requests by archive.archive_old_requests."""
+    __tablename__ = 'print_requests_archive'
+    
+    # Keeps the original print_requests id, so cursors stay valid across both tables
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    user = db.relationship('User')
+    
+    @property
+    def student_name(self):
+        return self.user.name
+        
+    @property
+    def student_class(self):
+        return self.user.student_class 
+
+class ExportJob(db.Model):
+    """A queued export; the worker stores the file as ExportJobChunks and the browser polls for it."""
+    __tablename__ = 'export_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'requests', 'students', 'users'
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON export arguments
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'done', 'failed'
+    requested_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'))
+    progress = db.Column(db.Integer, nullable=False, default=0)  # rows written so far
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    filename = db.Column(db.String(200))
+    mimetype = db.Column(db.String(100))
+    size = db.Column(db.BigInteger)  # bytes in the finished file
+    error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+class ExportJobChunk(db.Model):
+    """One piece of a finished export file, so neither storing nor downloading it holds the whole file."""
+    __tablename__ = 'export_job_chunks'
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('export_jobs.id', ondelete='CASCADE'), primary_key=True)
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+
+# Indexes for the hot dashboard/export queries. Keep in sync with
+# migrations/versions/*_add_hot_query_indexes.py
+db.Index('ix_print_requests_user_created', PrintRequest.user_id,
+         PrintRequest.created_at.desc(), PrintRequest.id.desc())
+db.Index('ix_print_requests_status_created', PrintRequest.status,
+         PrintRequest.created_at.desc(), PrintRequest.id.desc())
+db.Index('ix_print_requests_pending', PrintRequest.created_at.desc(), PrintRequest.id.desc(),
+         postgresql_where=PrintRequest.status == 'pending',
+         sqlite_where=PrintRequest.status == 'pending')
+# Version markers of the JSON request lists (see queue_api.py)
+db.Index('ix_print_requests_status_updated', PrintRequest.status, PrintRequest.updated_at)
+db.Index('ix_print_requests_user_updated', PrintRequest.user_id, PrintRequest.updated_at)
+# At most one pending request per student; see submit_print_request
+db.Index('uq_print_requests_user_pending', PrintRequest.user_id, unique=True,
+         postgresql_where=PrintRequest.status == 'pending',
+         sqlite_where=PrintRequest.status == 'pending')
+# Same access paths as the live table; created_at alone answers the archive horizon
+db.Index('ix_print_requests_archive_user_created', ArchivedPrintRequest.user_id,
+         ArchivedPrintRequest.created_at.desc(), ArchivedPrintRequest.id.desc())
+db.Index('ix_print_requests_archive_status_created', ArchivedPrintRequest.status,
+         ArchivedPrintRequest.created_at.desc(), ArchivedPrintRequest.id.desc())
+db.Index('ix_print_requests_archive_created', ArchivedPrintRequest.created_at.desc(),
+         ArchivedPrintRequest.id.desc())
+db.Index('ix_export_jobs_queued', ExportJob.id,
+         postgresql_where=ExportJob.status == 'queued',
+         sqlite_where=ExportJob.status == 'queued')
+db.Index('ix_export_jobs_requested_by', ExportJob.requested_by, ExportJob.created_at.desc())
+db.Index('ix_users_role', User.role)
+db.Index('ix_users_branch_semester', User.branch, User.semester)
+db.Index('ix_users_semester', User.semester)
+db.Index('ix_users_blocked', User.id,
+         postgresql_where=User.is_blocked == db.true(),
+         sqlite_where=User.is_blocked == db.true())
+db.Index('ix_users_username_search', User.username_search)
+db.Index('ix_users_name_search', User.name_search)
+# Substring (ILIKE '%term%') search on PostgreSQL; requires the pg_trgm extension
+db.Index('ix_users_username_trgm', User.username,
+         postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}).ddl_if(dialect='postgresql')
+db.Index('ix_users_name_trgm', User.name,
+         postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql')
+
+@db.event.listens_for(User, 'before_insert')
+@db.event.listens_for(User, 'before_update')
+def _update_search_columns(mapper, connection, user):
+    user.username_search = normalize_search_text(user.username)
+    user.name_search = normalize_search_text(user.name)
+
 class SystemStatus(db.Model):
     __tablename__ = 'system_status'
     
@@ -66,4 +212,46 @@ class SystemStatus(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_by = db.Column(db.Integer, db.ForeignKey('users.id'))
-    reason = db.Column(db.String(200), nullable=True) 
\ No newline at end of file
+    reason = db.Column(db.String(200), nullable=True)
+
+def submit_print_request(user_id):
+    """
+    Create a pending request for ``user_id`` in a single INSERT ... SELECT.
+
+    The service-active and not-blocked checks are part of the SELECT, and the
+    partial unique index on pending requests turns a second pending request
+    (e.g. a double click racing the first) into a no-op via ON CONFLICT DO NOTHING.
+
+    Returns the new (id, created_at) row, or None if nothing was inserted.
+    """
+    now = datetime.utcnow()
+    service_active = db.select(SystemStatus.is_active)\
+        .order_by(SystemStatus.id)\
+        .limit(1)\
+        .scalar_subquery()
+    candidate = db.select(
+        db.literal(user_id),
+        db.literal('pending'),
+        db.literal(now, db.DateTime),
+        db.literal(now, db.DateTime)
+    ).where(
+        # No status row yet means the service has never been switched off
+        db.func.coalesce(service_active, db.true()),
+        ~db.exists().where(User.id == user_id, User.is_blocked == db.true())
+    )
+
+    dialect = db.engine.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = insert(PrintRequest).on_conflict_do_nothing(
+            index_elements=[PrintRequest.user_id],
+            index_where=PrintRequest.status == 'pending'
+        )
+    else:
+        statement = db.insert(PrintRequest)
+
+    statement = statement\
+        .from_select(['user_id', 'status', 'created_at', 'updated_at'], candidate)\
+        .returning(PrintRequest.id, PrintRequest.created_at)
+    return db.session.execute(statement).first()
+
@@ -0,0 +1,140 @@
+import base64
+import binascii
+from datetime import datetime
+
+from flask import request
+
+from archive import archive_horizon
+from models import db, PrintRequest, ArchivedPrintRequest
+
+
+def encode_cursor(print_request):
+    """Encode the (created_at, id) position of a request as an opaque URL-safe token."""
+    raw = f"{print_request.created_at.isoformat()}|{print_request.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor token back into (created_at, id). Returns None if the token is invalid."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, request_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(request_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def _position_key(model):
+    return db.tuple_(model.created_at, model.id)
+
+
+def _sort_key(item):
+    return item.created_at, item.id
+
+
+class KeysetPagination:
+    """
+    Seek pagination over print requests ordered newest first by (created_at, id).
+
+    Each page is fetched with a ``WHERE (created_at, id) < cursor ... LIMIT n + 1``
+    query, so deep pages cost the same as the first one and no ``COUNT(*)`` is
+    issued unless ``total`` is actually read.
+
+    With ``archive_query`` (the same filters over ArchivedPrintRequest) the
+    archive is merged in, but only for pages that reach back past the archive
+    horizon; pages of recent requests never touch the archive table.
+    """
+
+    def __init__(self, query, per_page, after=None, before=None, archive_query=None):
+        self.query = query
+        self.archive_query = archive_query
+        self.per_page = per_page
+
+        after_key = decode_cursor(after)
+        before_key = decode_cursor(before) if not after_key else None
+
+        if before_key:
+            # Walk backwards (oldest first) from the cursor, then restore display order
+            rows = self._rows_before(query, PrintRequest, before_key)
+            if self._archive_holds_newer(before_key[0]):
+                rows = sorted(rows + self._rows_before(archive_query, ArchivedPrintRequest, before_key),
+                              key=_sort_key)[:per_page + 1]
+            self.has_prev = len(rows) > per_page
+            self.has_next = True
+            self.items = list(reversed(rows[:per_page]))
+        else:
+            rows = self._rows_after(query, PrintRequest, after_key)
+            # A full page ending after the horizon cannot contain archived requests
+            if self._archive_holds_newer(rows[-1].created_at if len(rows) > per_page else None):
+                rows = sorted(rows + self._rows_after(archive_query, ArchivedPrintRequest, after_key),
+                              key=_sort_key, reverse=True)[:per_page + 1]
+            self.has_next = len(rows) > per_page
+            self.has_prev = after_key is not None
+            self.items = rows[:per_page]
+
+        self._total = None
+
+    def _archive_holds_newer(self, created_at=None):
+        """Whether the archive may hold requests created at or after ``created_at`` (None: any at all)."""
+        if self.archive_query is None:
+            return False
+        horizon = archive_horizon()
+        return horizon is not None and (created_at is None or horizon >= created_at)
+
+    def _rows_after(self, query, model, after_key):
+        if after_key:
+            query = query.filter(_position_key(model) < after_key)
+        return query.order_by(model.created_at.desc(), model.id.desc())\
+            .limit(self.per_page + 1)\
+            .all()
+
+    def _rows_before(self, query, model, before_key):
+        return query.filter(_position_key(model) > before_key)\
+            .order_by(model.created_at.asc(), model.id.asc())\
+            .limit(self.per_page + 1)\
+            .all()
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.items:
+            return encode_cursor(self.items[-1])
+        return None
+
+    @property
+    def prev_cursor(self):
+        if self.has_prev and self.items:
+            return encode_cursor(self.items[0])
+        return None
+
+    @property
+    def total(self):
+        """Total number of matching rows, counted lazily on first access."""
+        if self._total is None:
+            self._total = self.query.order_by(None).count()
+            if self.archive_query is not None and archive_horizon() is not None:
+                self._total += self.archive_query.order_by(None).count()
+        return self._total
+
+
+def paginate_requests(query, per_page, archive_query=None):
+    """
+    Paginate a PrintRequest query from the current request arguments.
+
+    ``?after=<cursor>`` / ``?before=<cursor>`` (or no arguments at all) use keyset
+    pagination; an explicit ``?page=N`` keeps the old offset pagination so that
+    existing bookmarks still work. Offset pages only cover the live table.
+    """
+    if 'page' in request.args:
+        page = request.args.get('page', 1, type=int)
+        return query.order_by(PrintRequest.created_at.desc(), PrintRequest.id.desc())\
+            .paginate(page=page, per_page=per_page)
+
+    return KeysetPagination(
+        query,
+        per_page,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        archive_query=archive_query
+    )
@@ -0,0 +1,139 @@
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy.engine import Engine
+
+from models import db
+
+_SHAPE_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),                        # string literals
+    (re.compile(r'%\(\w+\)s|:\w+|\$\d+|__\[POSTCOMPILE_\w+\]'), '?'),  # bound parameters
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),                     # numbers
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?)'),          # IN (...) / VALUES (...) lists
+    (re.compile(r'\s+'), ' '),
+]
+
+# Recorders opened with count_queries() in this thread
+_local = threading.local()
+
+
+def statement_shape(statement):
+    """The statement with every literal and parameter replaced by ``?``, for spotting repeats."""
+    for pattern, replacement in _SHAPE_PATTERNS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by assert_max_queries when a block runs more statements than allowed."""
+
+
+class QueryRecorder:
+    """Statement count and time for one request or ``count_queries`` block."""
+
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = [] if keep_statements else None
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if self.statements is not None:
+            self.statements.append(statement)
+
+    def repeated(self, threshold):
+        """``(shape, times)`` for every statement shape run at least ``threshold`` times."""
+        shapes = Counter(statement_shape(statement) for statement in self.statements or [])
+        return [(shape, times) for shape, times in shapes.most_common() if times >= threshold]
+
+
+def current_queries():
+    """The current request's recorder, or None if it has not run any SQL yet."""
+    if has_request_context():
+        return g.get('query_recorder')
+    return None
+
+
+@contextmanager
+def count_queries():
+    """Record every statement this thread runs inside the block, e.g. through a test client."""
+    recorder = QueryRecorder(keep_statements=True)
+    stack = _local.__dict__.setdefault('recorders', [])
+    stack.append(recorder)
+    try:
+        yield recorder
+    finally:
+        stack.remove(recorder)
+
+
+@contextmanager
+def assert_max_queries(max_queries):
+    """Fail with the list of statements if the block runs more than ``max_queries`` of them."""
+    with count_queries() as recorder:
+        yield recorder
+    if recorder.count > max_queries:
+        statements = '\n'.join(f'  {number}. {statement_shape(statement)}'
+                               for number, statement in enumerate(recorder.statements, start=1))
+        raise QueryBudgetExceeded(f'{recorder.count} queries run, budget is {max_queries}:\n{statements}')
+
+
+@db.event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@db.event.listens_for(Engine, 'after_cursor_execute')
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+
+    for recorder in getattr(_local, 'recorders', ()):
+        recorder.record(statement, elapsed)
+
+    if has_request_context():
+        recorder = g.get('query_recorder')
+        if recorder is None:
+            recorder = g.query_recorder = QueryRecorder(current_app.config.get('QUERY_DEBUG', False))
+        recorder.record(statement, elapsed)
+
+
+@db.event.listens_for(Engine, 'handle_error')
+def _drop_query_timer(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+
+def init_query_budget(app):
+    """
+    With QUERY_DEBUG on (the development default), log requests that repeat a
+    statement shape QUERY_REPEAT_THRESHOLD times (a likely N+1) or run more than
+    QUERY_BUDGET statements, and add an X-Query-Count header to responses.
+    """
+    if not app.config.get('QUERY_DEBUG'):
+        return
+
+    @app.after_request
+    def _add_query_count_header(response):
+        recorder = current_queries()
+        response.headers['X-Query-Count'] = str(recorder.count if recorder else 0)
+        return response
+
+    @app.teardown_request
+    def _report_queries(error=None):
+        recorder = current_queries()
+        if recorder is None or request.path.startswith('/static/'):
+            return
+
+        for shape, times in recorder.repeated(app.config.get('QUERY_REPEAT_THRESHOLD', 5)):
+            app.logger.warning(f'Possible N+1 in {request.endpoint}: {times} x {shape[:300]}')
+
+        budget = app.config.get('QUERY_BUDGET')
+        if budget and recorder.count > budget:
+            app.logger.warning(f'{request.endpoint} ran {recorder.count} queries '
+                               f'({recorder.seconds * 1000:.1f} ms), budget is {budget}')
+
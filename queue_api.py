@@ -0,0 +1,91 @@
+import hashlib
+
+from flask import request
+
+from archive import ARCHIVABLE_STATUSES
+from models import db, PrintRequest
+
+
+# Every status a request can be in; a request leaving one is stamped under the next
+REQUEST_STATUSES = ('pending',) + ARCHIVABLE_STATUSES
+
+
+def _latest_update(*criteria):
+    # MAX over an index ending in updated_at: a single index probe
+    return db.select(db.func.max(PrintRequest.updated_at)).where(*criteria).scalar_subquery()
+
+
+def _count(*criteria):
+    return db.select(db.func.count(PrintRequest.id)).where(*criteria).scalar_subquery()
+
+
+def _version(*columns):
+    return tuple(db.session.execute(db.select(*columns)).one())
+
+
+def pending_queue_version():
+    """
+    Version marker of the pending queue: its size and the latest change in each status.
+
+    New requests are stamped as pending, and a request leaving the queue is
+    stamped under its new status. The count runs over the partial pending
+    index, so it stays as small as the queue itself.
+    """
+    return _version(
+        _count(PrintRequest.status == 'pending'),
+        *[_latest_update(PrintRequest.status == status) for status in REQUEST_STATUSES]
+    )
+
+
+def print_history_version():
+    """
+    Version marker of the printed history: the latest request stamped as printed.
+
+    Printed is final, so the history only grows. Archived requests stay in the
+    merged list. The exception is deleting an account, which is seen with the
+    next print.
+    """
+    return _version(_latest_update(PrintRequest.status == 'printed'))
+
+
+def student_requests_version(user_id):
+    """Version marker of one student's requests: their count and latest change."""
+    return _version(_count(PrintRequest.user_id == user_id),
+                    _latest_update(PrintRequest.user_id == user_id))
+
+
+def request_list_etag(scope, version):
+    """Strong ETag for one page of a request list: the scope, its version marker and the page arguments."""
+    marker = '|'.join(str(value) for value in version)
+    raw = f"{scope}|{marker}|{request.query_string.decode()}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def serialize_request(print_request, include_student=False):
+    data = {
+        'id': print_request.id,
+        'status': print_request.status,
+        'created_at': print_request.created_at.isoformat() if print_request.created_at else None,
+        'updated_at': print_request.updated_at.isoformat() if print_request.updated_at else None
+    }
+    if include_student:
+        user = print_request.user
+        data['student'] = {
+            'id': user.id,
+            'name': user.name,
+            'username': user.username,
+            'branch': user.branch,
+            'semester': user.semester
+        }
+    return data
+
+
+def serialize_page(page, include_student=False):
+    """JSON body for a KeysetPagination (or legacy offset Pagination) page."""
+    return {
+        'items': [serialize_request(item, include_student) for item in page.items],
+        'has_next': page.has_next,
+        'has_prev': page.has_prev,
+        'next_cursor': getattr(page, 'next_cursor', None),
+        'prev_cursor': getattr(page, 'prev_cursor', None)
+    }
@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import threading
+import time
+
+from limits.storage import Storage
+
+# Expired counters are swept once every this many increments per worker
+PURGE_EVERY = 1000
+
+
+class SQLiteStorage(Storage):
+    """
+    Fixed-window rate limit counters in a local SQLite file.
+
+    Every worker on the host opens the same WAL-mode database, so limits are
+    counted once per host rather than once per worker, without a network hop
+    per request. Register it by importing this module and configure it as
+    ``RATELIMIT_STORAGE_URI = 'sqlite:////path/to/ratelimit.db'``.
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri[len('sqlite:///'):] or ':memory:'
+        self.timeout = float(options.get('timeout', 5))
+        self._local = threading.local()
+        self._increments = 0
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        # Connections are per thread and must not survive a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                'key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        conn = self._connection()
+        # One atomic upsert: start a new window if the old one has expired, otherwise add to it
+        value = conn.execute(
+            'INSERT INTO rate_limits (key, value, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET '
+            'value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END, '
+            'expires_at = CASE WHEN expires_at <= ? OR ? THEN excluded.expires_at ELSE expires_at END '
+            'RETURNING value',
+            (key, amount, now + expiry, now, now, bool(elastic_expiry))
+        ).fetchone()[0]
+
+        self._increments += 1
+        if self._increments % PURGE_EVERY == 0:
+            conn.execute('DELETE FROM rate_limits WHERE expires_at <= ?', (now,))
+        return value
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM rate_limits WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._connection().execute(
+            'SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self._connection().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._connection().execute('DELETE FROM rate_limits').rowcount
+
+    def clear(self, key):
+        self._connection().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
@@ -0,0 +1,37 @@
+from models import db, User, normalize_search_text
+
+# Sorts after every real character, closing a prefix range: prefix <= x < prefix + PREFIX_END
+PREFIX_END = chr(0x10FFFF)
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _prefix_match(column, prefix):
+    # A range comparison instead of LIKE 'x%' so any btree index on the column is used,
+    # whatever the backend's LIKE collation rules are
+    return db.and_(column >= prefix, column < prefix + PREFIX_END)
+
+
+def user_search_filter(term, include_name=True):
+    """
+    Build the filter for a username (and optionally name) search.
+
+    On PostgreSQL this is a substring ILIKE, served by the pg_trgm GIN indexes
+    on users.username and users.name. Other databases cannot index a leading
+    wildcard, so they fall back to a prefix match on the normalized
+    username_search / name_search columns.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        pattern = f'%{_escape_like(term)}%'
+        conditions = [User.username.ilike(pattern, escape='\\')]
+        if include_name:
+            conditions.append(User.name.ilike(pattern, escape='\\'))
+    else:
+        prefix = normalize_search_text(term)
+        conditions = [_prefix_match(User.username_search, prefix)]
+        if include_name:
+            conditions.append(_prefix_match(User.name_search, prefix))
+
+    return db.or_(*conditions)
@@ -15,3 +15,159 @@ document.addEventListener('DOMContentLoaded', () => {
         localStorage.setItem('theme', newTheme);
     });
 });
+
+// Live print request updates (Server-Sent Events)
+const STATUS_BADGES = {
+    pending: 'bg-warning',
+    printed: 'bg-success',
+    cancelled: 'bg-danger'
+};
+
+// options: stream (use SSE), pollUrl (JSON request list polled otherwise) and pollSeconds
+function watchPrintRequests(handlers, options) {
+    if (!options.stream || !window.EventSource) {
+        pollPrintRequests(handlers, options);
+        return;
+    }
+
+    const source = new EventSource('/events/requests');
+    Object.keys(handlers).forEach((type) => {
+        source.addEventListener(type, (e) => handlers[type](JSON.parse(e.data)));
+    });
+    // The server answers 204 (streams off) or 503 (worker full), which closes the source for good
+    source.addEventListener('error', () => {
+        if (source.readyState === EventSource.CLOSED) pollPrintRequests(handlers, options);
+    });
+}
+
+// Turns changes between polls of a request list into the same events the stream sends
+function pollPrintRequests(handlers, { pollUrl, pollSeconds }) {
+    if (!window.fetch || !pollUrl) return;
+
+    let known = null;
+    const poll = () => {
+        // no-cache revalidates with the stored ETag, so an unchanged list costs a 304
+        fetch(pollUrl, { cache: 'no-cache', headers: { 'Accept': 'application/json' } })
+            .then((response) => response.json())
+            .then((page) => {
+                const current = new Map(page.items.map((item) => [item.id, item]));
+                if (known) {
+                    current.forEach((item, id) => {
+                        const before = known.get(id);
+                        if (!before) {
+                            if (handlers.created) {
+                                handlers.created({ requests: [[id]], created_at: item.created_at, student: item.student });
+                            }
+                        } else if (before.status !== item.status && handlers[item.status]) {
+                            handlers[item.status]({ requests: [[id]] });
+                        }
+                    });
+                    if (handlers.removed) {
+                        known.forEach((item, id) => {
+                            if (!current.has(id)) handlers.removed({ requests: [[id]] });
+                        });
+                    }
+                }
+                known = current;
+            })
+            .catch(() => {})
+            .finally(() => setTimeout(poll, pollSeconds * 1000));
+    };
+    poll();
+}
+
+function showLiveNotice(message, linkText = 'Refresh', linkHref = '', id = 'live-notice') {
+    let notice = document.getElementById(id);
+    if (!notice) {
+        notice = document.createElement('div');
+        notice.id = id;
+        notice.className = 'alert alert-info d-flex justify-content-between align-items-center mb-4';
+        notice.innerHTML = '<span></span><a class="alert-link"></a>';
+        const container = document.getElementById('main-content');
+        container.insertBefore(notice, container.firstChild);
+    }
+    notice.querySelector('span').textContent = message;
+    const link = notice.querySelector('a');
+    link.textContent = linkText || '';
+    link.hidden = !linkText;
+    link.setAttribute('href', linkHref);
+}
+
+function findRequestRows(event) {
+    return event.requests
+        .map(([id]) => document.querySelector(`tr[data-request-id="${id}"]`))
+        .filter((row) => row);
+}
+
+function setRequestStatus(row, status) {
+    const badge = row.querySelector('.badge');
+    badge.classList.remove(...Object.values(STATUS_BADGES));
+    badge.classList.add(STATUS_BADGES[status]);
+    badge.textContent = status;
+
+    const cancel = row.querySelector('[data-cancel-link]');
+    if (cancel) cancel.remove();
+}
+
+function formatRequestTime(isoString) {
+    // Same wall-clock values the server renders: DD-MM-YYYY and HH:MM:SS
+    const [date, time] = isoString.split('T');
+    const [year, month, day] = date.split('-');
+    return { date: `${day}-${month}-${year}`, time: time.slice(0, 8) };
+}
+
+// Background exports: links with data-export-kind queue a job and download it when ready
+function exportNotice(message, linkText = '', linkHref = '') {
+    showLiveNotice(message, linkText, linkHref, 'export-notice');
+}
+
+function pollExport(job) {
+    fetch(job.status_url, { headers: { 'Accept': 'application/json' } })
+        .then((response) => response.json())
+        .then((status) => {
+            if (status.status === 'done') {
+                exportNotice(`${status.filename} is ready.`, 'Download', status.download_url);
+                window.location = status.download_url;
+            } else if (status.status === 'failed') {
+                exportNotice(`Export failed: ${status.error || 'unknown error'}`);
+            } else {
+                const rows = status.progress ? ` (${status.progress} rows so far)` : '';
+                exportNotice(`Preparing export${rows}...`);
+                setTimeout(() => pollExport(job), 1500);
+            }
+        })
+        .catch(() => setTimeout(() => pollExport(job), 5000));
+}
+
+document.addEventListener('click', (e) => {
+    const link = e.target.closest('[data-export-kind]');
+    if (!link || !window.fetch) return;
+    e.preventDefault();
+
+    const params = JSON.parse(link.dataset.exportParams || '{}');
+    exportNotice('Starting export...');
+    fetch('/exports', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'X-CSRFToken': document.querySelector('meta[name="csrf-token"]').content
+        },
+        body: JSON.stringify({ kind: link.dataset.exportKind, ...params })
+    })
+        .then((response) => response.json())
+        .then((job) => {
+            if (job.status === 'error') {
+                exportNotice(job.message);
+                return;
+            }
+            if (job.message) {
+                showLiveNotice(job.message);
+            }
+            pollExport(job);
+        })
+        .catch(() => {
+            // Fall back to the synchronous download
+            window.location = link.href;
+        });
+});
@@ -0,0 +1,116 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# TestingConfig reads this at import; without TEST_DATABASE_URL the suite runs on a throwaway SQLite file
+_db_dir = tempfile.mkdtemp(prefix='printpal-tests-')
+os.environ.setdefault('TEST_DATABASE_URL', f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+
+STUDENTS = 5
+REQUESTS_PER_STUDENT = 4
+
+
+@pytest.fixture(scope='session')
+def app():
+    from main import create_app
+    from models import db
+
+    app = create_app('testing', bootstrap=False)
+    # Requests get their own app context; a shared one would keep the logged-in user in g
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def database(app):
+    """
+    Fresh tables and seed data for each test, with the process caches emptied so
+    requests start cold and the rate limits reset.
+    """
+    from archive import archive_horizon_cache
+    from cache import dashboard_stats_cache, system_status_cache, user_cache
+    from main import bootstrap_database
+    from models import db
+    from utils import limiter
+
+    with app.app_context():
+        db.drop_all()
+        bootstrap_database()
+        _seed()
+    for cache in (archive_horizon_cache, dashboard_stats_cache, system_status_cache, user_cache):
+        cache.clear()
+    limiter.reset()
+    return db
+
+
+def _seed():
+    """A few students, each with live requests in every status and one archived request."""
+    from models import db, ArchivedPrintRequest, PrintRequest, User
+
+    now = datetime.utcnow()
+    for number in range(1, STUDENTS + 1):
+        student = User(username=f'student{number}', role='student', name=f'Student {number}',
+                       branch='CSE', year='2023', batch='A', semester='3')
+        student.set_password('studentpass')
+        db.session.add(student)
+        db.session.flush()
+
+        statuses = ['pending', 'printed', 'printed', 'cancelled'][:REQUESTS_PER_STUDENT]
+        for offset, status in enumerate(statuses):
+            created_at = now - timedelta(hours=offset + 1)
+            db.session.add(PrintRequest(user_id=student.id, status=status,
+                                        created_at=created_at, updated_at=created_at))
+        archived_at = now - timedelta(days=400)
+        db.session.add(ArchivedPrintRequest(id=10000 + number, user_id=student.id, status='printed',
+                                            created_at=archived_at, updated_at=archived_at))
+    db.session.commit()
+
+
+def _client_as(app, username):
+    from models import db, User
+
+    with app.app_context():
+        user_id = db.session.execute(db.select(User.id).filter_by(username=username)).scalar_one()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+    return client
+
+
+@pytest.fixture
+def query_budget():
+    """
+    ``assert_max_queries`` for route tests, e.g.::
+
+        def test_dashboard(faculty_client, query_budget):
+            with query_budget(8):
+                faculty_client.get('/faculty/dashboard')
+    """
+    from query_budget import assert_max_queries
+
+    return assert_max_queries
+
+
+@pytest.fixture
+def client_as(app, database):
+    """A test client logged in as the given username, e.g. ``client_as('student2')``."""
+    return lambda username: _client_as(app, username)
+
+
+@pytest.fixture
+def faculty_client(app, database):
+    return _client_as(app, 'faculty1')
+
+
+@pytest.fixture
+def student_client(app, database):
+    return _client_as(app, 'student1')
+
+
+@pytest.fixture
+def admin_client(app, database):
+    return _client_as(app, 'admin')
@@ -0,0 +1,59 @@
+from models import PrintRequest, User
+
+
+def _request_ids(app, username, status):
+    with app.app_context():
+        return [request_id for (request_id,) in PrintRequest.query.join(User)
+                .filter(User.username == username, PrintRequest.status == status)
+                .with_entities(PrintRequest.id)]
+
+
+def test_summary_per_row(app, faculty_client):
+    pending = _request_ids(app, 'student1', 'pending') + _request_ids(app, 'student2', 'pending')
+    printed = _request_ids(app, 'student3', 'printed')[0]
+    cancelled = _request_ids(app, 'student3', 'cancelled')[0]
+    missing = 999999
+
+    response = faculty_client.post('/faculty/bulk-action', json={
+        'action': 'printed',
+        'request_ids': pending + [printed, cancelled, missing, pending[0]]
+    })
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['status'], body['action'], body['updated'], body['skipped']) == ('success', 'printed', 2, 3)
+    assert body['results'] == {
+        **{str(request_id): 'updated' for request_id in pending},
+        str(printed): 'already printed',
+        str(cancelled): 'already cancelled',
+        str(missing): 'not found',
+    }
+    assert _request_ids(app, 'student1', 'pending') == []
+
+
+def test_cancel_counts_towards_the_block(app, faculty_client):
+    pending = _request_ids(app, 'student1', 'pending')
+    response = faculty_client.post('/faculty/bulk-action', json={'action': 'cancelled', 'request_ids': pending})
+
+    assert response.get_json()['results'] == {str(pending[0]): 'updated'}
+    with app.app_context():
+        assert User.query.filter_by(username='student1').one().consecutive_cancellations == 1
+
+
+def test_form_submission_flashes_the_summary(app, faculty_client):
+    pending = _request_ids(app, 'student1', 'pending')
+    printed = _request_ids(app, 'student1', 'printed')[0]
+
+    response = faculty_client.post('/faculty/bulk-action', data={
+        'action': 'printed', 'request_ids': [str(pending[0]), str(printed)]
+    })
+
+    assert response.status_code == 302
+    with faculty_client.session_transaction() as sess:
+        assert sess['_flashes'] == [('success', '1 request marked as printed. 1 skipped because they were not pending.')]
+
+
+def test_rejects_invalid_input(faculty_client, student_client):
+    assert faculty_client.post('/faculty/bulk-action', json={'action': 'deleted', 'request_ids': [1]}).status_code == 400
+    assert faculty_client.post('/faculty/bulk-action', json={'action': 'printed', 'request_ids': []}).status_code == 400
+    assert student_client.post('/faculty/bulk-action', json={'action': 'printed', 'request_ids': [1]}).status_code == 403
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import PrintRequest, User
+
+
+@pytest.fixture
+def cancelled_run(app, database):
+    """A blocked student whose four requests, oldest first, were all cancelled; returns their ids."""
+    with app.app_context():
+        student = User(username='canceller', role='student', name='Canceller',
+                       consecutive_cancellations=4, is_blocked=True)
+        student.set_password('studentpass')
+        database.session.add(student)
+        database.session.flush()
+
+        start = datetime.utcnow() - timedelta(days=1)
+        requests = [PrintRequest(user_id=student.id, status='cancelled',
+                                 created_at=start + timedelta(hours=hours), updated_at=start)
+                    for hours in range(4)]
+        database.session.add_all(requests)
+        database.session.commit()
+        return [print_request.id for print_request in requests]
+
+
+def _block_state(app):
+    with app.app_context():
+        student = User.query.filter_by(username='canceller').one()
+        return student.consecutive_cancellations, student.is_blocked
+
+
+def test_printing_an_older_request_keeps_the_newer_run(app, faculty_client, cancelled_run):
+    faculty_client.get(f'/faculty/mark-printed/{cancelled_run[0]}')
+    assert _block_state(app) == (3, True)
+
+
+def test_printing_inside_the_run_shortens_it(app, faculty_client, cancelled_run):
+    faculty_client.get(f'/faculty/mark-printed/{cancelled_run[2]}')
+    assert _block_state(app) == (1, False)
+
+
+def test_printing_the_newest_request_ends_the_run(app, faculty_client, cancelled_run):
+    faculty_client.get(f'/faculty/mark-printed/{cancelled_run[-1]}')
+    assert _block_state(app) == (0, False)
@@ -0,0 +1,28 @@
+from events import broker
+
+
+def test_student_dashboard_polls_instead_of_streaming(student_client):
+    # Students hold no stream by default; EventSource gives up on a 204
+    assert student_client.get('/events/requests').status_code == 204
+    assert b'stream: false' in student_client.get('/student/dashboard').data
+
+
+def test_faculty_stream_refused_when_worker_is_full(app, faculty_client, monkeypatch):
+    monkeypatch.setitem(app.config, 'SSE_MAX_STREAMS', 1)
+    subscriber = broker.subscribe()
+    try:
+        response = faculty_client.get('/events/requests')
+        assert response.status_code == 503
+        assert response.headers['Retry-After']
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+def test_faculty_stream(app, faculty_client, monkeypatch):
+    monkeypatch.setitem(app.config, 'SSE_MAX_STREAM_SECONDS', 0)
+    assert b'stream: true' in faculty_client.get('/faculty/dashboard').data
+
+    response = faculty_client.get('/events/requests')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.data.startswith(b'retry:')
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import export_jobs
+from export_jobs import MAX_ATTEMPTS, claim_next_job, enqueue_export, retry_job, run_job
+from models import ExportJob
+
+
+def _failing_export(**params):
+    raise RuntimeError('disk full')
+
+
+def _queue_failing_job(database, monkeypatch):
+    monkeypatch.setitem(export_jobs.EXPORT_BUILDERS, 'users', _failing_export)
+    job_id = enqueue_export('users', {}, None).id
+    database.session.commit()
+    return job_id
+
+
+def test_failed_job_is_retried_until_max_attempts(app, database, monkeypatch):
+    with app.app_context():
+        job_id = _queue_failing_job(database, monkeypatch)
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            assert claim_next_job() == job_id
+            run_job(job_id)
+            job = database.session.get(ExportJob, job_id)
+            assert job.attempts == attempt
+            assert job.error == 'disk full'
+            assert job.status == ('failed' if attempt == MAX_ATTEMPTS else 'queued')
+            database.session.remove()
+
+        assert claim_next_job() is None
+
+
+def test_retry_job_requeues_a_failed_job(app, database, monkeypatch):
+    with app.app_context():
+        job_id = _queue_failing_job(database, monkeypatch)
+        database.session.query(ExportJob).filter_by(id=job_id)\
+            .update({'status': 'failed', 'attempts': MAX_ATTEMPTS, 'finished_at': datetime.utcnow()})
+        database.session.commit()
+
+        assert retry_job(job_id)
+        job = database.session.get(ExportJob, job_id)
+        assert (job.status, job.attempts, job.finished_at) == ('queued', 0, None)
+        assert not retry_job(job_id)
+
+
+def test_long_running_sqlite_job_is_not_requeued(app, database, monkeypatch):
+    # SQLite jobs send no heartbeats, so an old heartbeat_at does not mean the worker died
+    with app.app_context():
+        job_id = _queue_failing_job(database, monkeypatch)
+        claim_next_job()
+        database.session.query(ExportJob).filter_by(id=job_id)\
+            .update({'heartbeat_at': datetime.utcnow() - export_jobs.STALE_AFTER - timedelta(minutes=1)})
+        database.session.commit()
+
+        export_jobs._requeue_stale_jobs()
+        assert database.session.get(ExportJob, job_id).status == 'running'
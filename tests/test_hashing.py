@@ -0,0 +1,30 @@
+import time
+
+import pytest
+
+import hashing
+from hashing import PasswordHashingBusy
+
+
+@pytest.fixture
+def hashing_pool(app, monkeypatch):
+    # One pool process and no queue, with a short timeout
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_POOL_SIZE', 1)
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_QUEUE_SIZE', 0)
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_TIMEOUT', 0.2)
+    monkeypatch.setattr(hashing, '_executor_pid', None)
+    with app.app_context():
+        yield
+        hashing._executor.shutdown(wait=True)
+
+
+def test_timed_out_hash_keeps_its_slot(hashing_pool):
+    with pytest.raises(PasswordHashingBusy, match='timed out'):
+        hashing._run(time.sleep, 1)
+
+    # Still running in the pool, so there is no room for another one
+    with pytest.raises(PasswordHashingBusy, match='queue is full'):
+        hashing._run(time.sleep, 0)
+
+    time.sleep(1)
+    assert hashing._run(time.sleep, 0) is None
@@ -0,0 +1,26 @@
+def test_loading_the_forms_is_not_limited(app, database):
+    client = app.test_client()
+    for _ in range(60):
+        assert client.get('/login').status_code == 200
+        assert client.get('/register').status_code == 200
+
+
+def test_submissions_are_limited_per_account_and_address(app, database):
+    client = app.test_client()
+    codes = [client.post('/login', data={'username': 'faculty1', 'password': 'wrong'}).status_code
+             for _ in range(11)]
+    assert 429 not in codes[:10]
+    assert codes[10] == 429
+
+    # The same account is not locked out for someone on another address
+    response = client.post('/login', data={'username': 'faculty1', 'password': 'wrong'},
+                           environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert response.status_code != 429
+
+
+def test_submissions_are_capped_per_address(app, database):
+    client = app.test_client()
+    codes = [client.post('/login', data={'username': f'student{number}', 'password': 'wrong'}).status_code
+             for number in range(51)]
+    assert 429 not in codes[:50]
+    assert codes[50] == 429
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from archive import archive_old_requests
+from models import ArchivedPrintRequest, PrintRequest, User
+from pagination import KeysetPagination
+from query_budget import count_queries
+
+PER_PAGE = 3
+
+
+@pytest.fixture
+def history(app, database):
+    """A student with 7 recent requests and 7 old ones moved to the archive; ids newest first."""
+    with app.app_context():
+        student = User(username='pager', role='student', name='Pager')
+        student.set_password('studentpass')
+        database.session.add(student)
+        database.session.flush()
+
+        now = datetime.utcnow()
+        for number in range(14):
+            # Two requests share each timestamp, so the id breaks the tie
+            created_at = now - timedelta(days=number // 2 + (400 if number >= 7 else 0))
+            database.session.add(PrintRequest(user_id=student.id, status='printed',
+                                              created_at=created_at, updated_at=created_at))
+        database.session.commit()
+        assert archive_old_requests(180) == 7
+
+        rows = [(request.created_at, request.id) for model in (PrintRequest, ArchivedPrintRequest)
+                for request in model.query.filter_by(user_id=student.id)]
+        return student.id, [request_id for _, request_id in sorted(rows, reverse=True)]
+
+
+def _page(user_id, after=None, before=None):
+    return KeysetPagination(
+        PrintRequest.query.filter_by(user_id=user_id),
+        PER_PAGE,
+        after=after,
+        before=before,
+        archive_query=ArchivedPrintRequest.query.filter_by(user_id=user_id)
+    )
+
+
+def test_cursor_continues_into_the_archive(app, history):
+    user_id, expected = history
+    with app.test_request_context():
+        pages = []
+        page = _page(user_id)
+        assert not page.has_prev
+        while True:
+            pages.append(page)
+            if not page.has_next:
+                break
+            page = _page(user_id, after=page.next_cursor)
+
+        assert [item.id for page in pages for item in page.items] == expected
+        # The page crossing the horizon mixes live and archived rows
+        assert {type(item) for item in pages[2].items} == {PrintRequest, ArchivedPrintRequest}
+        assert all(isinstance(item, ArchivedPrintRequest) for item in pages[-1].items)
+        assert pages[-1].next_cursor is None
+
+
+def test_before_walks_back_out_of_the_archive(app, history):
+    user_id, expected = history
+    with app.test_request_context():
+        page = _page(user_id)
+        while page.has_next:
+            page = _page(user_id, after=page.next_cursor)
+
+        seen = []
+        while True:
+            seen = [item.id for item in page.items] + seen
+            if not page.has_prev:
+                break
+            page = _page(user_id, before=page.prev_cursor)
+
+        assert seen == expected
+        assert len(page.items) == PER_PAGE
+
+
+def test_recent_pages_skip_the_archive(app, history):
+    user_id, expected = history
+    with app.test_request_context():
+        _page(user_id)  # caches the archive horizon
+        with count_queries() as recorder:
+            page = _page(user_id)
+
+        assert [item.id for item in page.items] == expected[:PER_PAGE]
+        assert recorder.count == 1
+        assert 'print_requests_archive' not in recorder.statements[0]
+
+
+def test_json_list_pages_through_the_archive(app, client_as, history):
+    _user_id, expected = history
+    client = client_as('pager')
+
+    ids = []
+    cursor = None
+    while True:
+        body = client.get('/api/my-requests', query_string={'per_page': 4, 'after': cursor}).get_json()
+        ids += [item['id'] for item in body['items']]
+        cursor = body['next_cursor']
+        if not body['has_next']:
+            break
+
+    assert ids == expected
@@ -0,0 +1,61 @@
+import pytest
+
+from models import PrintRequest, SystemStatus, User, submit_print_request
+
+
+@pytest.fixture
+def student_id(app, database):
+    """A student without any requests yet."""
+    with app.app_context():
+        student = User(username='newstudent', role='student', name='New Student')
+        student.set_password('studentpass')
+        database.session.add(student)
+        database.session.commit()
+        return student.id
+
+
+def _pending_count(database, user_id):
+    return PrintRequest.query.filter_by(user_id=user_id, status='pending').count()
+
+
+def test_submit_creates_pending_request(app, database, student_id):
+    with app.app_context():
+        row = submit_print_request(student_id)
+        database.session.commit()
+
+        assert row is not None
+        created = database.session.get(PrintRequest, row.id)
+        assert (created.user_id, created.status) == (student_id, 'pending')
+        assert created.created_at == row.created_at
+
+
+def test_submit_while_service_is_off(app, database, student_id):
+    with app.app_context():
+        SystemStatus.query.update({'is_active': False})
+        database.session.commit()
+
+        assert submit_print_request(student_id) is None
+        database.session.rollback()
+        assert _pending_count(database, student_id) == 0
+
+
+def test_submit_while_blocked(app, database, student_id):
+    with app.app_context():
+        User.query.filter_by(id=student_id).update({'is_blocked': True, 'consecutive_cancellations': 3})
+        database.session.commit()
+
+        assert submit_print_request(student_id) is None
+        database.session.rollback()
+        assert _pending_count(database, student_id) == 0
+
+
+def test_second_pending_request_is_a_no_op(app, database, student_id):
+    with app.app_context():
+        first = submit_print_request(student_id)
+        database.session.commit()
+
+        # ON CONFLICT DO NOTHING on the partial unique index, not an IntegrityError
+        assert submit_print_request(student_id) is None
+        database.session.commit()
+        assert _pending_count(database, student_id) == 1
+        assert PrintRequest.query.filter_by(user_id=student_id).one().id == first.id
@@ -0,0 +1,45 @@
+import pytest
+
+# Statements per cold request (empty process caches) against the seed data in
+# conftest.py; a query per listed row would blow every one of these budgets
+
+
+@pytest.mark.parametrize('url, budget', [
+    ('/faculty/dashboard', 3),
+    ('/faculty/print-history', 5),
+])
+def test_faculty_pages(faculty_client, query_budget, url, budget):
+    with query_budget(budget):
+        response = faculty_client.get(url)
+    assert response.status_code == 200
+
+
+def test_student_dashboard(student_client, query_budget):
+    with query_budget(6):
+        response = student_client.get('/student/dashboard')
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('status', ['printed', 'cancelled'])
+@pytest.mark.parametrize('export_format', ['csv', 'xlsx'])
+def test_export_requests(faculty_client, query_budget, status, export_format):
+    # Exports stream their rows, so the body is read inside the budget
+    with query_budget(3):
+        response = faculty_client.get(f'/faculty/export-requests?status={status}&format={export_format}')
+        assert response.status_code == 200
+        assert response.data
+
+
+def test_export_pending_requests(faculty_client, query_budget):
+    # Also marks the exported requests as printed and unblocks students
+    with query_budget(8):
+        response = faculty_client.get('/faculty/export-requests?status=pending&format=csv')
+        assert response.status_code == 200
+        assert response.data.decode().count('\n') == 6
+
+
+def test_export_users(admin_client, query_budget):
+    with query_budget(2):
+        response = admin_client.get('/admin/export-users')
+        assert response.status_code == 200
+        assert response.data
@@ -0,0 +1,70 @@
+import pytest
+
+from models import PrintRequest, User
+
+
+def _pending_request_id(app, username):
+    with app.app_context():
+        return PrintRequest.query.join(User)\
+            .filter(User.username == username, PrintRequest.status == 'pending')\
+            .one().id
+
+
+@pytest.mark.parametrize('who, url', [
+    ('faculty', '/api/queue/pending'),
+    ('faculty', '/api/queue/history'),
+    ('student', '/api/my-requests'),
+])
+def test_unchanged_list_is_not_modified(request, who, url):
+    client = request.getfixturevalue(f'{who}_client')
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    repeated = client.get(url, headers={'If-None-Match': etag})
+    assert repeated.status_code == 304
+    assert repeated.headers['ETag'] == etag
+    assert not repeated.data
+
+
+def test_etags_change_when_a_request_is_printed(app, faculty_client, student_client):
+    etags = {
+        url: client.get(url).headers['ETag']
+        for client, url in [(faculty_client, '/api/queue/pending'),
+                            (faculty_client, '/api/queue/history'),
+                            (student_client, '/api/my-requests')]
+    }
+
+    request_id = _pending_request_id(app, 'student1')
+    faculty_client.get(f'/faculty/mark-printed/{request_id}')
+
+    for client, url in [(faculty_client, '/api/queue/pending'),
+                        (faculty_client, '/api/queue/history'),
+                        (student_client, '/api/my-requests')]:
+        response = client.get(url, headers={'If-None-Match': etags[url]})
+        assert response.status_code == 200, url
+        assert response.headers['ETag'] != etags[url]
+
+
+def test_etags_change_when_a_request_is_cancelled(app, faculty_client, student_client):
+    pending_etag = faculty_client.get('/api/queue/pending').headers['ETag']
+    student_etag = student_client.get('/api/my-requests').headers['ETag']
+
+    request_id = _pending_request_id(app, 'student1')
+    student_client.get(f'/student/cancel-request/{request_id}')
+
+    response = faculty_client.get('/api/queue/pending', headers={'If-None-Match': pending_etag})
+    assert response.status_code == 200
+    assert request_id not in [item['id'] for item in response.get_json()['items']]
+    response = student_client.get('/api/my-requests', headers={'If-None-Match': student_etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != student_etag
+
+
+def test_other_students_etag_is_unaffected(app, client_as, faculty_client):
+    other = client_as('student2')
+    etag = other.get('/api/my-requests').headers['ETag']
+
+    faculty_client.get(f'/faculty/mark-printed/{_pending_request_id(app, "student1")}')
+
+    assert other.get('/api/my-requests', headers={'If-None-Match': etag}).status_code == 304
@@ -2,9 +2,13 @@ from functools import wraps
 from flask import request, current_app
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from flask_login import current_user
+from jinja2 import FileSystemBytecodeCache
 import logging
 import os
 
+import ratelimit  # registers the sqlite:// rate limit storage
+
 # Setup logging
 def setup_logging(app):
     log_level = getattr(logging, app.config['LOG_LEVEL'].upper())
@@ -24,11 +28,43 @@ def setup_logging(app):
         ))
         app.logger.addHandler(file_handler)
     
-# Setup rate limiter
+class SafeBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache that keeps rendering if the cache directory is read-only."""
+    
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+# Setup template bytecode cache
+def setup_template_cache(app):
+    cache_dir = app.config.get('JINJA_CACHE_DIR')
+    if not cache_dir:
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        return
+    # Must be set before app.jinja_env is first created
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': SafeBytecodeCache(cache_dir)}
+    
+def rate_limit_key():
+    # Logged-in users get their own budget instead of sharing their NAT's address
+    if current_user.is_authenticated:
+        return f'user:{current_user.get_id()}'
+    return get_remote_address()
+
+def login_rate_key():
+    # Attempts on one account from one address: guesses from elsewhere cannot use
+    # up a student's budget and lock them out
+    username = (request.form.get('username') or '').strip().lower()
+    return f'login:{username}:{get_remote_address()}'
+
+# Setup rate limiter; storage comes from RATELIMIT_STORAGE_URI
 limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["50 per minute"],
-    storage_uri="memory://"
+    key_func=rate_limit_key,
+    default_limits=["50 per minute"]
 )
 
 def init_limiter(app):
@@ -36,4 +72,10 @@ def init_limiter(app):
     
 # Rate limit decorators
 def login_limit():
-    return limiter.limit("50 per minute") 
+    # Only submissions count; loading the form is free, so students behind one
+    # campus address cannot run out just by opening the login page
+    not_a_submission = lambda: request.method != 'POST'
+    per_account = limiter.limit("10 per minute", key_func=login_rate_key, exempt_when=not_a_submission)
+    # Caps one address guessing across many accounts
+    per_address = limiter.limit("50 per minute", key_func=get_remote_address, exempt_when=not_a_submission)
+    return lambda view: per_address(per_account(view))